@@ -0,0 +1,264 @@
+"""Инкрементальные итоги по спортсменам и типам тренировок.
+
+Каждое событие обновляет итоги и скользящие окна за O(1)
+амортизированно, без повторного расчёта истории. Состояние можно
+сохранить снимком и восстановить после перезапуска.
+"""
+import json
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from homework import InfoMessage
+from ingest import PacketConsumer
+
+DAY: int = 24 * 60 * 60
+DEFAULT_WINDOWS: Dict[str, float] = {'7d': 7 * DAY, '30d': 30 * DAY}
+DEFAULT_BUCKETS: int = 168
+ALL: str = '*'
+SNAPSHOT_VERSION: int = 3
+
+Key = Tuple[str, str]
+
+
+class Totals:
+    """Количество и суммы времени, дистанции и калорий."""
+
+    __slots__ = ('count', 'duration', 'distance', 'calories')
+
+    def __init__(self, count: int = 0, duration: float = 0.0,
+                 distance: float = 0.0, calories: float = 0.0) -> None:
+        self.count = count
+        self.duration = duration
+        self.distance = distance
+        self.calories = calories
+
+    def add(self, duration: float, distance: float, calories: float,
+            sign: int = 1) -> None:
+        """Прибавить (или при `sign=-1` вычесть) одну тренировку."""
+        self.count += sign
+        self.duration += sign * duration
+        self.distance += sign * distance
+        self.calories += sign * calories
+
+    def as_dict(self) -> Dict[str, float]:
+        """Суммы и средние значения."""
+        count, duration = self.count, self.duration
+        return {
+            'count': count,
+            'duration': self.duration,
+            'distance': self.distance,
+            'calories': self.calories,
+            'mean_duration': duration / count if count else 0.0,
+            'mean_distance': self.distance / count if count else 0.0,
+            'mean_calories': self.calories / count if count else 0.0,
+            'mean_speed': self.distance / duration if duration else 0.0,
+        }
+
+    def merge(self, other: 'Totals') -> None:
+        """Прибавить другие итоги."""
+        self.count += other.count
+        self.duration += other.duration
+        self.distance += other.distance
+        self.calories += other.calories
+
+    def state(self) -> List[float]:
+        """Состояние для снимка."""
+        return [self.count, self.duration, self.distance, self.calories]
+
+
+class RollingWindow:
+    """Итоги за последние `span` секунд по корзинам времени.
+
+    Окно делится на `buckets` корзин шириной `span / buckets`; в
+    каждой хранятся только суммы её событий, поэтому память окна не
+    зависит от числа событий. Окно сдвигается целыми корзинами:
+    событие учитывается, пока его корзина входит в `buckets`
+    последних. Опоздавшие события попадают в свою корзину, события
+    старше окна не учитываются.
+    """
+
+    __slots__ = ('span', 'size', 'width', 'buckets', 'totals', 'head')
+
+    def __init__(self, span: float, buckets: int = DEFAULT_BUCKETS) -> None:
+        if span <= 0 or buckets < 1:
+            raise ValueError('Длина окна и число корзин '
+                             'должны быть положительными')
+        self.span = span
+        self.size = buckets
+        self.width = span / buckets
+        self.buckets: Dict[int, Totals] = {}
+        self.totals = Totals()
+        self.head: Optional[int] = None
+
+    def index(self, timestamp: float) -> int:
+        """Номер корзины момента времени."""
+        return int(timestamp // self.width)
+
+    def add(self, timestamp: float, duration: float, distance: float,
+            calories: float) -> None:
+        """Учесть событие и вытеснить устаревшие корзины."""
+        index = self.index(timestamp)
+        if self.head is not None and index <= self.head - self.size:
+            return
+        bucket = self.buckets.get(index)
+        if bucket is None:
+            bucket = self.buckets[index] = Totals()
+        bucket.add(duration, distance, calories)
+        self.totals.add(duration, distance, calories)
+        if self.head is None or index > self.head:
+            self.head = index
+            self._evict()
+
+    def _evict(self) -> None:
+        """Удалить корзины вне окна и пересчитать суммы по остальным."""
+        border = self.head - self.size
+        stale = [index for index in self.buckets if index <= border]
+        if not stale:
+            return
+        for index in stale:
+            del self.buckets[index]
+        self.totals = self._sum(border)
+
+    def _sum(self, border: int) -> Totals:
+        """Суммы корзин новее `border`."""
+        totals = Totals()
+        for index, bucket in self.buckets.items():
+            if index > border:
+                totals.merge(bucket)
+        return totals
+
+    def expire(self, now: float) -> None:
+        """Сдвинуть окно к моменту `now`."""
+        index = self.index(now)
+        if self.head is None or index > self.head:
+            self.head = index
+            self._evict()
+
+    def totals_at(self, now: Optional[float] = None) -> Totals:
+        """Итоги окна на момент `now` без изменения окна."""
+        if now is None or self.head is None or self.index(now) <= self.head:
+            return self.totals
+        return self._sum(self.index(now) - self.size)
+
+    def state(self) -> Dict[str, Any]:
+        """Состояние для снимка."""
+        return {'span': self.span, 'size': self.size, 'head': self.head,
+                'totals': self.totals.state(),
+                'buckets': [[index, *bucket.state()]
+                            for index, bucket in self.buckets.items()]}
+
+    @classmethod
+    def from_state(cls, state: Mapping[str, Any]) -> 'RollingWindow':
+        """Восстановить окно из снимка."""
+        window = cls(state['span'], state['size'])
+        window.head = state['head']
+        window.totals = Totals(*state['totals'])
+        window.buckets = {index: Totals(*values)
+                          for index, *values in state['buckets']}
+        return window
+
+
+class _Entry:
+    """Итоги и окна одного ключа агрегации."""
+
+    __slots__ = ('totals', 'windows')
+
+    def __init__(self, windows: Mapping[str, float],
+                 buckets: int = DEFAULT_BUCKETS) -> None:
+        self.totals = Totals()
+        self.windows = {name: RollingWindow(span, buckets)
+                        for name, span in windows.items()}
+
+
+class Aggregator(PacketConsumer):
+    """Инкрементальные итоги по спортсменам и типам тренировок.
+
+    Каждое событие обновляет четыре ключа: (спортсмен, тип),
+    (спортсмен, `ALL`), (`ALL`, тип) и общий (`ALL`, `ALL`). Окна
+    делятся на `buckets` корзин времени.
+    """
+
+    def __init__(self,
+                 windows: Optional[Mapping[str, float]] = None,
+                 buckets: int = DEFAULT_BUCKETS) -> None:
+        self.windows: Dict[str, float] = dict(
+            DEFAULT_WINDOWS if windows is None else windows)
+        self.buckets = buckets
+        self._entries: Dict[Key, _Entry] = {}
+
+    def _entry(self, key: Key) -> _Entry:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(self.windows, self.buckets)
+        return entry
+
+    def update(self, info: InfoMessage, athlete: str,
+               timestamp: float) -> None:
+        """Учесть рассчитанную тренировку спортсмена."""
+        duration, distance, calories = (info.duration, info.distance,
+                                        info.calories)
+        for key in ((athlete, info.training_type), (athlete, ALL),
+                    (ALL, info.training_type), (ALL, ALL)):
+            entry = self._entry(key)
+            entry.totals.add(duration, distance, calories)
+            for window in entry.windows.values():
+                window.add(timestamp, duration, distance, calories)
+
+    def keys(self) -> List[Key]:
+        """Все ключи агрегации."""
+        return list(self._entries)
+
+    def stats(self, athlete: str = ALL, training_type: str = ALL,
+              now: Optional[float] = None) -> Dict[str, Any]:
+        """Итоги и окна по ключу.
+
+        Если задан `now`, окна считаются на этот момент; само
+        состояние при этом не меняется.
+        """
+        entry = self._entries.get((athlete, training_type))
+        if entry is None:
+            entry = _Entry(self.windows, self.buckets)
+        result: Dict[str, Any] = entry.totals.as_dict()
+        for name, window in entry.windows.items():
+            result[name] = window.totals_at(now).as_dict()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Состояние агрегатора в виде, пригодном для JSON."""
+        return {
+            'version': SNAPSHOT_VERSION,
+            'windows': self.windows,
+            'buckets': self.buckets,
+            'entries': [
+                {'key': list(key),
+                 'totals': entry.totals.state(),
+                 'windows': {name: window.state()
+                             for name, window in entry.windows.items()}}
+                for key, entry in self._entries.items()
+            ],
+        }
+
+    @classmethod
+    def restore(cls, snapshot: Mapping[str, Any]) -> 'Aggregator':
+        """Восстановить агрегатор из снимка."""
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError('Неподдерживаемая версия снимка: '
+                             f'{snapshot.get("version")}')
+        aggregator = cls(snapshot['windows'], snapshot['buckets'])
+        for item in snapshot['entries']:
+            entry = _Entry({})
+            entry.totals = Totals(*item['totals'])
+            entry.windows = {name: RollingWindow.from_state(state)
+                             for name, state in item['windows'].items()}
+            aggregator._entries[tuple(item['key'])] = entry
+        return aggregator
+
+    def save(self, path: str) -> None:
+        """Записать снимок в JSON-файл."""
+        with open(path, 'w', encoding='utf-8') as stream:
+            json.dump(self.snapshot(), stream)
+
+    @classmethod
+    def load(cls, path: str) -> 'Aggregator':
+        """Прочитать снимок из JSON-файла."""
+        with open(path, encoding='utf-8') as stream:
+            return cls.restore(json.load(stream))
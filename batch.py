@@ -0,0 +1,96 @@
+"""Пакетный расчёт показателей тренировок по столбцам данных."""
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from homework import InfoMessage
+from registry import WORKOUT_TYPES, get_workout
+
+Column = Sequence[float]
+
+
+class BatchResult(NamedTuple):
+    """Рассчитанные показатели для всех строк пакета."""
+
+    distance: array
+    speed: array
+    calories: array
+
+
+def group_rows(codes: Sequence[str]) -> Dict[str, List[int]]:
+    """Сгруппировать номера строк по коду тренировки."""
+    groups: Dict[str, List[int]] = {}
+    for index, code in enumerate(codes):
+        rows = groups.get(code)
+        if rows is None:
+            get_workout(code)
+            rows = groups[code] = []
+        rows.append(index)
+    return groups
+
+
+def compute_batch(codes: Sequence[str],
+                  action: Column,
+                  duration: Column,
+                  weight: Column,
+                  height: Optional[Column] = None,
+                  length_pool: Optional[Column] = None,
+                  count_pool: Optional[Column] = None,
+                  **extra: Column,
+                  ) -> BatchResult:
+    """Рассчитать дистанцию, скорость и калории для всех строк пакета.
+
+    Строки группируются по коду тренировки, и каждая группа считается
+    пакетным ядром из реестра типов тренировок. Порядок операций в ядрах
+    совпадает с методами классов, поэтому результаты совпадают бит в бит.
+    Столбцы дополнительных полей зарегистрированных типов передаются
+    именованными аргументами.
+    """
+    columns: Dict[str, Optional[Column]] = {
+        'action': action,
+        'duration': duration,
+        'weight': weight,
+        'height': height,
+        'length_pool': length_pool,
+        'count_pool': count_pool,
+        **extra,
+    }
+    size = len(codes)
+    for name, column in columns.items():
+        if column is not None and len(column) != size:
+            raise ValueError(f'Столбец {name} содержит {len(column)} строк,'
+                             f' ожидалось {size}')
+    groups = group_rows(codes)
+    result = BatchResult(array('d', bytes(8 * size)),
+                         array('d', bytes(8 * size)),
+                         array('d', bytes(8 * size)))
+    for code, rows in groups.items():
+        workout = WORKOUT_TYPES[code]
+        whole = len(rows) == size
+        group_columns: Dict[str, Column] = {}
+        for name in workout.kernel_fields:
+            column = columns.get(name)
+            if column is None:
+                raise ValueError(f'Для {workout.training_class.__name__} '
+                                 f'нужен столбец {name}')
+            group_columns[name] = (column if whole
+                                   else [column[i] for i in rows])
+        values = workout.compute(group_columns)
+        for target, source in zip(result, values):
+            if whole:
+                target[:] = array('d', source)
+            else:
+                for i, value in zip(rows, source):
+                    target[i] = value
+    return result
+
+
+def iter_messages(codes: Sequence[str],
+                  duration: Column,
+                  result: BatchResult,
+                  ) -> Iterator[InfoMessage]:
+    """Собрать информационные сообщения по результатам пакета."""
+    names = {code: workout.training_class.__name__
+             for code, workout in WORKOUT_TYPES.items()}
+    for code, time, distance, speed, calories in zip(
+            codes, duration, *result):
+        yield InfoMessage(names[code], time, distance, speed, calories)
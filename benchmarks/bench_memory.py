@@ -0,0 +1,65 @@
+"""Память на одну тренировку: обычные классы, `__slots__` и массивы.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_memory [количество]
+"""
+import sys
+import tracemalloc
+from typing import Callable, Iterator, List, Tuple
+
+from compact import TrainingBatch, slotted_class
+from homework import InfoMessage, Running
+
+DEFAULT_SIZE: int = 100_000
+
+
+def rows(size: int) -> Iterator[Tuple[float, float, float]]:
+    """Различные данные пробежек, чтобы числа не разделялись."""
+    for i in range(size):
+        yield 1000.0 + i, 0.5 + i / size, 60.0 + i % 40
+
+
+def measure(build: Callable[[int], object], size: int) -> float:
+    """Удерживаемая память на одну запись в байтах."""
+    tracemalloc.start()
+    kept = build(size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current / size
+
+
+def build_objects(size: int) -> List[Running]:
+    return [Running(*row) for row in rows(size)]
+
+
+def build_slotted(size: int) -> list:
+    slotted_running = slotted_class(Running)
+    return [slotted_running(*row) for row in rows(size)]
+
+
+def build_batch(size: int) -> TrainingBatch:
+    return TrainingBatch('RUN', rows(size))
+
+
+def build_messages(size: int) -> List[InfoMessage]:
+    return [InfoMessage('Running', t, a / 1000, a / 1000 / t, w)
+            for a, t, w in rows(size)]
+
+
+def main(size: int = DEFAULT_SIZE) -> None:
+    """Напечатать таблицу байт на тренировку."""
+    cases = [
+        ('Running (__dict__)', build_objects),
+        ('Running (__slots__)', build_slotted),
+        ('TrainingBatch', build_batch),
+        ('InfoMessage (__slots__)', build_messages),
+    ]
+    print(f'{size} тренировок')
+    for name, build in cases:
+        print(f'{name:<25} {measure(build, size):8.1f} байт/тренировку')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE)
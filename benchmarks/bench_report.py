@@ -0,0 +1,57 @@
+"""Скорость вывода сообщений: `main` против буферизованного отчёта.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_report [количество]
+"""
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Callable, List
+
+import homework
+import report
+
+DEFAULT_SIZE: int = 200_000
+
+
+def messages(size: int) -> List[homework.InfoMessage]:
+    """Сообщения для смеси трёх типов тренировок."""
+    packages = [
+        ('SWM', [720, 1, 80, 25, 40]),
+        ('RUN', [15000, 1, 75]),
+        ('WLK', [9000, 1, 75, 180]),
+    ]
+    return [homework.read_package(*packages[i % 3]).show_training_info()
+            for i in range(size)]
+
+
+def timed(run: Callable[[], None]) -> float:
+    """Время выполнения в секундах."""
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def main(size: int = DEFAULT_SIZE) -> None:
+    """Напечатать сообщений в секунду для каждого способа вывода."""
+    data = messages(size)
+
+    def print_each() -> None:
+        with redirect_stdout(io.StringIO()):
+            for info in data:
+                print(info.get_message())
+
+    cases = [('print(get_message())', print_each)]
+    for fmt in report.RENDERERS:
+        cases.append((f'BufferedSink {fmt}',
+                      lambda fmt=fmt: report.write_report(
+                          data, io.StringIO(), fmt)))
+    print(f'{size} сообщений')
+    for name, run in cases:
+        print(f'{name:<22} {size / timed(run):12,.0f} сообщений/с')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE)
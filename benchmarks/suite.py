@@ -0,0 +1,274 @@
+"""Набор замеров производительности с базовой линией в JSON.
+
+Замеряет пропускную способность каждой стадии обработки и всего
+конвейера на входах от 10^3 до 10^7 пакетов для каждого типа
+тренировки и их смеси. Результаты сравниваются с сохранённой базовой
+линией; падение пропускной способности больше порога считается
+регрессией и завершает запуск с кодом 1.
+
+Большие входы замеряются блоками по `BLOCK_SIZE` пакетов: вход
+стадии строится для блока прямо перед замером, поэтому память не
+растёт с размером входа.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.suite --sizes 3-5 --baseline bench.json
+    python -m benchmarks.suite --sizes 3-7 --save bench.json
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from functools import partial
+from typing import (Any, Callable, Dict, Iterable, Iterator, List,
+                    NamedTuple, Optional, Sequence, Tuple)
+
+from batch import compute_batch
+from homework import read_package
+from ingest import Packet, iter_info, iter_packets
+from registry import WORKOUT_TYPES
+from report import render_text
+
+WORKLOADS: Dict[str, Sequence[str]] = {
+    'RUN': ('RUN',),
+    'WLK': ('WLK',),
+    'SWM': ('SWM',),
+    'mixed': ('SWM', 'RUN', 'WLK'),
+}
+COLUMNS = ('action', 'duration', 'weight',
+           'height', 'length_pool', 'count_pool')
+DEFAULT_THRESHOLD: float = 0.2
+DEFAULT_REPEAT: int = 3
+BLOCK_SIZE: int = 10 ** 5
+
+
+def packet_blocks(size: int, codes: Sequence[str],
+                  block_size: int = BLOCK_SIZE) -> Iterator[List[str]]:
+    """Строки CSV со случайными, но воспроизводимыми пакетами.
+
+    Строки выдаются блоками не длиннее `block_size`.
+    """
+    rnd = random.Random(size)
+    lines: List[str] = []
+    for i in range(size):
+        code = codes[i % len(codes)]
+        fields = [rnd.randint(100, 30000), rnd.randint(1, 5),
+                  rnd.randint(40, 120)]
+        if code == 'WLK':
+            fields.append(rnd.randint(140, 210))
+        elif code == 'SWM':
+            fields.extend([rnd.randint(10, 50), rnd.randint(1, 80)])
+        lines.append(','.join(map(str, [code, *fields])))
+        if len(lines) == block_size:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+def _columns(packets: List[Packet]) -> Dict[str, List[float]]:
+    """Столбцы пакетов для пакетного движка."""
+    columns = {name: [0] * len(packets) for name in COLUMNS}
+    for index, packet in enumerate(packets):
+        fields = WORKOUT_TYPES[packet.workout_type].fields
+        for name, value in zip(fields, packet.data):
+            columns[name][index] = value
+    return columns
+
+
+def _packets(lines: List[str]) -> List[Packet]:
+    return list(iter_packets(lines))
+
+
+def _trainings(lines: List[str]) -> List[Any]:
+    return [read_package(p.workout_type, p.data)
+            for p in iter_packets(lines)]
+
+
+def _messages(lines: List[str]) -> List[Any]:
+    return list(iter_info(iter_packets(lines)))
+
+
+def _batch_input(lines: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+    packets = _packets(lines)
+    return [packet.workout_type for packet in packets], _columns(packets)
+
+
+def _drain(iterable: Iterable[Any]) -> None:
+    deque(iterable, maxlen=0)
+
+
+class Stage(NamedTuple):
+    """Стадия: подготовка её входа из строк CSV и замеряемый прогон."""
+
+    prepare: Callable[[List[str]], Any]
+    run: Callable[[Any], Any]
+
+
+STAGES: Dict[str, Stage] = {
+    'parse': Stage(list, lambda lines: list(iter_packets(lines))),
+    'read_package': Stage(_packets, lambda packets: [
+        read_package(p.workout_type, p.data) for p in packets]),
+    'show_training_info': Stage(_trainings, lambda trainings: [
+        t.show_training_info() for t in trainings]),
+    'get_message': Stage(_messages, lambda messages: [
+        m.get_message() for m in messages]),
+    'render_text': Stage(_messages, render_text),
+    'batch': Stage(_batch_input, lambda args: compute_batch(
+        args[0], **args[1])),
+    'end_to_end': Stage(list, lambda lines: _drain(
+        m.get_message() for m in iter_info(iter_packets(lines)))),
+}
+
+
+def best_time(run: Callable[[], Any], repeat: int) -> float:
+    """Лучшее время выполнения из `repeat` попыток, секунд.
+
+    Первый прогон только прогревает кэши и не учитывается.
+    """
+    run()
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(run: Callable[[], Any]) -> int:
+    """Пиковая память, выделенная во время выполнения, в байтах."""
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure(stage: Stage, size: int, codes: Sequence[str],
+            repeat: int, memory: bool) -> Dict[str, float]:
+    """Замерить стадию на `size` пакетах блоками по `BLOCK_SIZE`.
+
+    Пропускная способность - записи, делённые на сумму лучших времён
+    блоков. Пиковая память на пакет замеряется на первом блоке.
+    """
+    result: Dict[str, float] = {}
+    elapsed = 0.0
+    for lines in packet_blocks(size, codes, BLOCK_SIZE):
+        run = partial(stage.run, stage.prepare(lines))
+        elapsed += best_time(run, repeat)
+        if memory and not result:
+            result['peak_bytes_per_packet'] = peak_memory(run) / len(lines)
+        del run, lines
+    result['throughput'] = size / elapsed if elapsed else float('inf')
+    return result
+
+
+def run_suite(sizes: Sequence[int],
+              workloads: Sequence[str],
+              repeat: int = DEFAULT_REPEAT,
+              memory: bool = True,
+              stage_names: Optional[Sequence[str]] = None,
+              ) -> Dict[str, Dict[str, float]]:
+    """Выполнить замеры; ключ результата - `стадия/нагрузка/размер`."""
+    results: Dict[str, Dict[str, float]] = {}
+    for workload in workloads:
+        for size in sizes:
+            for name, stage in STAGES.items():
+                if stage_names and name not in stage_names:
+                    continue
+                results[f'{name}/{workload}/{size}'] = measure(
+                    stage, size, WORKLOADS[workload], repeat, memory)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD,
+            ) -> List[str]:
+    """Описания регрессий относительно базовой линии.
+
+    Регрессия - падение пропускной способности или рост памяти больше
+    чем на долю `threshold`. Замеры, которых нет в базовой линии,
+    пропускаются.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append(
+                f'{key}: {result["throughput"]:,.0f} записей/с против '
+                f'{base["throughput"]:,.0f} в базовой линии')
+        base_memory = base.get('peak_bytes_per_packet')
+        memory = result.get('peak_bytes_per_packet')
+        if (base_memory is not None and memory is not None
+                and memory > base_memory * (1 + threshold)):
+            regressions.append(
+                f'{key}: {memory:,.0f} байт/пакет против '
+                f'{base_memory:,.0f} в базовой линии')
+    return regressions
+
+
+def _sizes(value: str) -> List[int]:
+    """Разобрать `3-5` как [10^3, 10^4, 10^5], `4` как [10^4]."""
+    low, _, high = value.partition('-')
+    return [10 ** exponent
+            for exponent in range(int(low), int(high or low) + 1)]
+
+
+def _environment() -> Dict[str, str]:
+    return {'python': platform.python_version(),
+            'machine': platform.machine(),
+            'system': platform.system()}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=_sizes, default=_sizes('3-5'),
+                        help='степени десяти, например 3-7')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS),
+                        help='через запятую: ' + ', '.join(WORKLOADS))
+    parser.add_argument('--stages', default='',
+                        help='через запятую; по умолчанию все')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--baseline', help='JSON с базовой линией')
+    parser.add_argument('--threshold', type=float,
+                        default=DEFAULT_THRESHOLD)
+    parser.add_argument('--save', help='записать результаты в JSON')
+    args = parser.parse_args(argv)
+
+    workloads = [w for w in args.workloads.split(',') if w]
+    results = run_suite(args.sizes, workloads, args.repeat,
+                        not args.no_memory,
+                        [s for s in args.stages.split(',') if s])
+    for key, result in sorted(results.items()):
+        memory = result.get('peak_bytes_per_packet')
+        extra = f' {memory:10,.0f} байт/пакет' if memory is not None else ''
+        print(f'{key:<40} {result["throughput"]:14,.0f} записей/с{extra}')
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as stream:
+            json.dump({'environment': _environment(), 'results': results},
+                      stream, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as stream:
+            baseline = json.load(stream)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'РЕГРЕССИЯ {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Двоичный формат пакетов фиксированной ширины и чтение через mmap.
+
+Файл начинается с заголовка в 16 байт (little-endian, `<4sHHQ`):
+
+    magic        4 байта  b'FTPK'
+    version      uint16   версия формата, сейчас 1
+    record_size  uint16   размер записи в байтах, сейчас 56
+    count        uint64   количество записей
+
+За заголовком следуют записи по 56 байт (`<B7x6d`):
+
+    type_id      uint8    номер кода тренировки в TYPE_CODES плюс один
+    padding      7 байт   выравнивание числовых полей по 8 байтам
+    action       float64
+    duration     float64
+    weight       float64
+    height       float64  только для WLK, иначе 0
+    length_pool  float64  только для SWM, иначе 0
+    count_pool   float64  только для SWM, иначе 0
+
+Все числовые поля хранятся как float64, поэтому целые значения
+из текстовых дампов читаются обратно как float.
+"""
+import mmap
+import os
+import struct
+import sys
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from batch import BatchResult, compute_batch
+from ingest import Packet, iter_packets
+from registry import WORKOUT_TYPES
+
+MAGIC: bytes = b'FTPK'
+VERSION: int = 1
+HEADER = struct.Struct('<4sHHQ')
+RECORD = struct.Struct('<B7x6d')
+FIELDS: Tuple[str, ...] = ('action', 'duration', 'weight',
+                           'height', 'length_pool', 'count_pool')
+TYPE_CODES: Tuple[str, ...] = ('SWM', 'RUN', 'WLK')
+TYPE_IDS: Dict[str, int] = {code: i + 1 for i, code in enumerate(TYPE_CODES)}
+
+_DOUBLES_PER_RECORD = RECORD.size // 8
+
+
+def _type_code(type_id: int) -> str:
+    """Код тренировки по номеру из записи."""
+    if not 0 < type_id <= len(TYPE_CODES):
+        raise ValueError(f'{type_id} - неизвестный номер типа тренировки')
+    return TYPE_CODES[type_id - 1]
+
+
+def encode_packet(packet: Packet) -> bytes:
+    """Упаковать пакет в двоичную запись."""
+    workout_type, data = packet.workout_type, packet.data
+    if workout_type not in TYPE_IDS:
+        raise ValueError(f'{workout_type} - неизвестный тип тренировки;'
+                         f' используйте: {", ".join(TYPE_CODES)}')
+    names = WORKOUT_TYPES[workout_type].fields
+    if len(data) != len(names):
+        raise ValueError(f'Для {workout_type} нужно {len(names)} полей,'
+                         f' получено {len(data)}')
+    values = dict(zip(names, data))
+    return RECORD.pack(TYPE_IDS[workout_type],
+                       *(float(values.get(name, 0)) for name in FIELDS))
+
+
+def write_packets(stream: BinaryIO, packets: Iterable[Packet]) -> int:
+    """Записать пакеты в двоичный поток и вернуть их количество.
+
+    Поток должен поддерживать `seek`: количество записей дописывается
+    в заголовок после того, как все пакеты записаны.
+    """
+    start = stream.tell()
+    stream.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+    count = 0
+    for packet in packets:
+        stream.write(encode_packet(packet))
+        count += 1
+    end = stream.tell()
+    stream.seek(start)
+    stream.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count))
+    stream.seek(end)
+    return count
+
+
+def convert(source: str, target: str, fmt: str = 'csv') -> int:
+    """Преобразовать текстовый дамп CSV/JSON-lines в двоичный файл."""
+    with open(source, encoding='utf-8') as lines, open(target, 'wb') as out:
+        return write_packets(out, iter_packets(lines, fmt))
+
+
+class PacketFile:
+    """Двоичный файл пакетов, отображённый в память.
+
+    Столбцы отдаются как `memoryview` поверх страниц файла без
+    копирования данных. Перед `close` все полученные представления
+    нужно освободить, иначе mmap не сможет закрыться.
+    """
+
+    def __init__(self, path: str) -> None:
+        if sys.byteorder != 'little':
+            raise ValueError('Чтение без копирования поддерживается '
+                             'только на little-endian платформах')
+        self._file = open(path, 'rb')
+        self._mmap: Optional[mmap.mmap] = None
+        try:
+            self._open(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self, path: str) -> None:
+        """Отобразить файл в память и проверить заголовок."""
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            raise ValueError(f'{path} не является файлом пакетов '
+                             f'версии {VERSION}')
+        self._mmap = mmap.mmap(self._file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, record_size, count = HEADER.unpack_from(self._view)
+        if (magic, version, record_size) != (MAGIC, VERSION, RECORD.size):
+            raise ValueError(f'{path} не является файлом пакетов '
+                             f'версии {VERSION}')
+        end = HEADER.size + count * RECORD.size
+        if len(self._view) < end:
+            raise ValueError(f'{path} обрезан: ожидалось {count} записей')
+        self._count = count
+        self._records = self._view[HEADER.size:end]
+        self._bytes = self._records.cast('B')
+        self._doubles = self._records.cast('d')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> 'PacketFile':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    @property
+    def type_ids(self) -> memoryview:
+        """Столбец номеров типов тренировок."""
+        return self._bytes[0::RECORD.size]
+
+    def column(self, name: str) -> memoryview:
+        """Столбец числового поля без копирования."""
+        offset = FIELDS.index(name) + 1
+        return self._doubles[offset::_DOUBLES_PER_RECORD]
+
+    def columns(self) -> Dict[str, memoryview]:
+        """Все числовые столбцы файла."""
+        return {name: self.column(name) for name in FIELDS}
+
+    def codes(self) -> List[str]:
+        """Столбец кодов тренировок."""
+        return [_type_code(i) for i in self.type_ids]
+
+    def compute(self) -> BatchResult:
+        """Рассчитать показатели всех записей пакетным движком."""
+        return compute_batch(self.codes(), **self.columns())
+
+    def iter_packets(self) -> Iterator[Packet]:
+        """Восстановить пакеты для обработки через `read_package`."""
+        for type_id, *values in RECORD.iter_unpack(self._records):
+            workout_type = _type_code(type_id)
+            row = dict(zip(FIELDS, values))
+            fields = WORKOUT_TYPES[workout_type].fields
+            yield Packet(workout_type, [row[name] for name in fields])
+
+    def close(self) -> None:
+        """Освободить представления и закрыть файл."""
+        for name in ('_doubles', '_bytes', '_records', '_view'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
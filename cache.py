@@ -0,0 +1,218 @@
+"""Кэш результатов по содержимому пакета.
+
+Блоки датчиков повторяют отправку, поэтому многие пакеты совпадают
+байт в байт. Ключ кэша - нормализованный пакет: код типа и поля как
+числа с плавающей точкой, так что `15000` и `15000.0` совпадают, -
+вместе с формулами и коэффициентами типа тренировки, чтобы после их
+изменения старые результаты не использовались. В памяти хранятся
+последние `max_size` результатов (LRU), на диске - необязательный
+второй уровень в SQLite без ограничения размера.
+"""
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import blake2b
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from homework import CacheStats, InfoMessage, coefficient_names
+from ingest import Packet, packet_info
+from registry import WorkoutType, get_workout
+
+DEFAULT_MAX_SIZE: int = 100_000
+DEFAULT_COMMIT_EVERY: int = 1000
+CACHE_VERSION: int = 2
+
+Key = Tuple[object, ...]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    training_type TEXT NOT NULL,
+    duration REAL NOT NULL,
+    distance REAL NOT NULL,
+    speed REAL NOT NULL,
+    calories REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+@dataclass
+class ResultCacheStats(CacheStats):
+    """Счётчики кэша результатов."""
+
+    evictions: int = 0
+    disk_hits: int = 0
+
+    def reset(self) -> None:
+        super().reset()
+        self.evictions = self.disk_hits = 0
+
+
+def packet_key(packet: Packet) -> Key:
+    """Нормализованный ключ пакета: код типа и поля как float."""
+    return (packet.workout_type.strip(), *map(float, packet.data))
+
+
+def identity_key(packet: Packet) -> Key:
+    """Ключ повтора: спортсмен, время и нормализованный пакет."""
+    return (packet.athlete, float(packet.timestamp), *packet_key(packet))
+
+
+def digest(key: Key) -> str:
+    """Адрес результата на диске - хэш версии кэша и ключа."""
+    return blake2b(repr((CACHE_VERSION, key)).encode('utf-8'),
+                   digest_size=16).hexdigest()
+
+
+class _Version:
+    """Формулы и чтение коэффициентов одного типа тренировки."""
+
+    __slots__ = ('workout', 'formulas', 'coefficients')
+
+    def __init__(self, workout: WorkoutType) -> None:
+        names = coefficient_names(workout.training_class)
+        self.workout = workout
+        self.formulas = repr(sorted(workout.formulas.items()))
+        self.coefficients: Callable[[Any], Any] = (
+            attrgetter(*names) if names else lambda training_class: ())
+
+    def __call__(self) -> Tuple[str, Any]:
+        return self.formulas, self.coefficients(self.workout.training_class)
+
+
+class ResultCache:
+    """LRU-кэш `InfoMessage` по содержимому пакета."""
+
+    def __init__(self,
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 path: Optional[str] = None,
+                 commit_every: int = DEFAULT_COMMIT_EVERY,
+                 ) -> None:
+        if max_size < 1:
+            raise ValueError('Размер кэша должен быть положительным')
+        self.max_size = max_size
+        self.stats = ResultCacheStats()
+        self._memory: 'OrderedDict[Key, InfoMessage]' = OrderedDict()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._commit_every = commit_every
+        self._pending = 0
+        self._versions: Dict[str, _Version] = {}
+        if path is not None:
+            self._disk = sqlite3.connect(path)
+            self._disk.execute(SCHEMA)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _remember(self, key: Key, info: InfoMessage) -> None:
+        """Положить результат в память, вытеснив самый старый."""
+        memory = self._memory
+        memory[key] = info
+        if len(memory) > self.max_size:
+            memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _load(self, key: Key) -> Optional[InfoMessage]:
+        """Прочитать результат со второго уровня."""
+        if self._disk is None:
+            return None
+        row = self._disk.execute(
+            'SELECT training_type, duration, distance, speed, calories '
+            'FROM results WHERE key = ?', (digest(key),)).fetchone()
+        return None if row is None else InfoMessage(*row)
+
+    def _store(self, key: Key, info: InfoMessage) -> None:
+        """Записать результат на второй уровень."""
+        if self._disk is None:
+            return
+        self._disk.execute(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+            (digest(key), info.training_type, info.duration, info.distance,
+             info.speed, info.calories))
+        self._pending += 1
+        if self._pending >= self._commit_every:
+            self.flush()
+
+    def lookup(self, key: Key) -> Optional[InfoMessage]:
+        """Результат по ключу или None; учитывает попадания и промахи."""
+        info = self._memory.get(key)
+        if info is not None:
+            self._memory.move_to_end(key)
+            self.stats.hits += 1
+            return info
+        info = self._load(key)
+        if info is not None:
+            self._remember(key, info)
+            self.stats.hits += 1
+            self.stats.disk_hits += 1
+            return info
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: Key, info: InfoMessage) -> None:
+        """Сохранить результат на обоих уровнях."""
+        self._remember(key, info)
+        self._store(key, info)
+
+    def key(self, packet: Packet) -> Key:
+        """Ключ результата: пакет, формулы и коэффициенты его типа."""
+        code = packet.workout_type.strip()
+        workout = get_workout(code)
+        version = self._versions.get(code)
+        if version is None or version.workout is not workout:
+            version = self._versions[code] = _Version(workout)
+        return (*packet_key(packet), *version())
+
+    def compute(self, packet: Packet) -> Tuple[InfoMessage, bool]:
+        """Результат пакета и признак того, что он взят из кэша."""
+        key = self.key(packet)
+        info = self.lookup(key)
+        if info is not None:
+            return info, True
+        info = packet_info(packet)
+        self.put(key, info)
+        return info, False
+
+    def flush(self) -> None:
+        """Зафиксировать записи второго уровня."""
+        if self._disk is not None and self._pending:
+            self._disk.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        """Зафиксировать записи и закрыть второй уровень."""
+        if self._disk is not None:
+            self.flush()
+            self._disk.close()
+            self._disk = None
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def iter_cached(packets: Iterable[Packet],
+                cache: ResultCache,
+                drop_duplicates: bool = False,
+                ) -> Iterator[InfoMessage]:
+    """Рассчитать пакеты через кэш.
+
+    При `drop_duplicates=True` повторы пакетов (тот же спортсмен, время
+    и данные) не попадают в вывод. Повторы ищутся среди последних
+    `cache.max_size` пакетов; более давний повтор считается новым.
+    """
+    compute = cache.compute
+    seen: 'OrderedDict[Key, None]' = OrderedDict()
+    for packet in packets:
+        if drop_duplicates:
+            identity = identity_key(packet)
+            if identity in seen:
+                seen.move_to_end(identity)
+                continue
+            seen[identity] = None
+            if len(seen) > cache.max_size:
+                seen.popitem(last=False)
+        yield compute(packet)[0]
@@ -0,0 +1,170 @@
+"""Пакетная обработка файлов с пакетами из командной строки.
+
+Примеры запуска из корня репозитория:
+
+    python -m cli packets.csv
+    cat packets.jsonl | python -m cli -f jsonl -o csv > report.csv
+    python -m cli -w 4 -b 4096 big.csv --rejects rejects.jsonl
+    python -m cli -f bin packets.bin -o jsonl
+
+Модули, нужные только отдельным режимам (пул процессов, двоичный
+формат, проверка с отбраковкой), импортируются при выборе режима,
+чтобы короткие запуски не платили за них временем старта. Импорт
+и обработка небольшого файла должны укладываться в
+`STARTUP_BUDGET` секунд.
+
+С `-w` файл делится между процессами на диапазоны байт; если задан
+`-b`, он читается потоком и раздаётся процессам порциями по `-b`
+пакетов.
+"""
+import argparse
+import sys
+from contextlib import nullcontext
+from typing import (TYPE_CHECKING, ContextManager, Iterator, List, Optional,
+                    Sequence, TextIO)
+
+if TYPE_CHECKING:
+    from homework import InfoMessage
+
+INPUT_FORMATS = ('csv', 'jsonl', 'bin')
+OUTPUT_FORMATS = ('text', 'csv', 'jsonl')
+COLUMNAR_FORMATS = ('ftcl', 'arrow', 'parquet')
+DEFAULT_BATCH_SIZE: int = 4096
+STARTUP_BUDGET: float = 0.3
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Разобрать аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        prog='python -m cli', description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['-'],
+                        help='файлы с пакетами; `-` или ничего - stdin')
+    parser.add_argument('-f', '--input-format', choices=INPUT_FORMATS,
+                        default='csv')
+    parser.add_argument('-o', '--output-format',
+                        choices=OUTPUT_FORMATS + COLUMNAR_FORMATS,
+                        default='text')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='число процессов; 0 - по числу ядер')
+    parser.add_argument('-b', '--batch-size', type=int,
+                        help='размер порции для процессов и вывода; '
+                             f'по умолчанию {DEFAULT_BATCH_SIZE}')
+    parser.add_argument('--rejects',
+                        help='проверять пакеты и писать отказы в файл')
+    parser.add_argument('--metrics',
+                        help='записать замеры стадий в JSON-файл')
+    parser.add_argument('--output', default='-',
+                        help='файл отчёта; по умолчанию stdout')
+    args = parser.parse_args(argv)
+    args.byte_shards = args.batch_size is None
+    if args.batch_size is None:
+        args.batch_size = DEFAULT_BATCH_SIZE
+    if args.batch_size < 1:
+        parser.error('размер порции должен быть положительным')
+    if args.input_format == 'bin' and '-' in args.paths:
+        parser.error('двоичный формат читается только из файла')
+    if args.rejects and args.input_format == 'bin':
+        parser.error('проверка поддерживается для csv и jsonl')
+    if args.output_format in COLUMNAR_FORMATS and args.output == '-':
+        parser.error('столбцовый формат пишется только в файл')
+    return args
+
+
+def _binary_messages(path: str) -> Iterator['InfoMessage']:
+    """Сообщения по двоичному файлу через пакетный движок."""
+    from batch import iter_messages
+    from binpack import PacketFile
+
+    with PacketFile(path) as packets:
+        codes = packets.codes()
+        column = packets.column('duration')
+        duration = column.tolist()
+        column.release()
+        result = packets.compute()
+    return iter_messages(codes, duration, result)
+
+
+def _open_input(path: str) -> ContextManager[TextIO]:
+    """Вход для `with`: файл закрывается, stdin остаётся открытым."""
+    from ingest import open_input
+
+    lines = open_input(path)
+    return nullcontext(lines) if lines is sys.stdin else lines
+
+
+def _text_messages(path: str, args: argparse.Namespace,
+                   rejects: Optional[TextIO]) -> Iterator['InfoMessage']:
+    """Сообщения по файлу CSV или JSON-lines."""
+    from ingest import iter_info, iter_packets
+
+    workers = args.workers
+    if (workers != 1 and path != '-' and rejects is None
+            and args.byte_shards):
+        from parallel import process_file
+        yield from process_file(path, args.input_format, workers or None)
+        return
+    with _open_input(path) as lines:
+        if rejects is not None:
+            from validate import RejectSink, iter_valid
+            packets = iter_valid(lines, args.input_format,
+                                 RejectSink(rejects), args.batch_size)
+        else:
+            packets = iter_packets(lines, args.input_format)
+        if workers != 1:
+            from parallel import process_packets
+            yield from process_packets(packets, workers or None,
+                                       args.batch_size)
+        else:
+            yield from iter_info(packets)
+
+
+def iter_messages(args: argparse.Namespace,
+                  rejects: Optional[TextIO] = None) -> Iterator['InfoMessage']:
+    """Сообщения по всем входным файлам по порядку."""
+    for path in args.paths:
+        if args.input_format == 'bin':
+            yield from _binary_messages(path)
+        else:
+            yield from _text_messages(path, args, rejects)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа командной строки."""
+    args = parse_args(argv)
+    if args.metrics:
+        import instrument
+        instrument.enable()
+    from report import write_report
+
+    opened: List[TextIO] = []
+    try:
+        rejects = None
+        if args.rejects:
+            rejects = open(args.rejects, 'w', encoding='utf-8')
+            opened.append(rejects)
+        messages = iter_messages(args, rejects)
+        if args.output_format in COLUMNAR_FORMATS:
+            from columnar import write_columns
+            write_columns(messages, args.output, args.output_format,
+                          args.batch_size)
+        else:
+            out = sys.stdout
+            if args.output != '-':
+                out = open(args.output, 'w', encoding='utf-8')
+                opened.append(out)
+            write_report(messages, out, args.output_format,
+                         args.batch_size)
+    except (KeyError, OSError, OverflowError, TypeError, ValueError,
+            ZeroDivisionError) as error:
+        print(f'Ошибка: {error}', file=sys.stderr)
+        return 1
+    finally:
+        for stream in opened:
+            stream.close()
+    if args.metrics:
+        instrument.METRICS.export_json(args.metrics)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""Распределённая обработка: координатор и рабочие по сокетам.
+
+Координатор делит вход на разделы (диапазоны байт файла или группы
+спортсменов) и раздаёт их рабочим, подключившимся по TCP. Рабочий
+считает раздел обычными классами тренировок и возвращает сообщения.
+Если рабочий отключился, не ответил за `task_timeout` секунд или
+сообщил о сбое окружения (нет файла, не хватило памяти), его раздел
+отдаётся другому рабочему. Ошибка в данных раздела (`DATA_ERRORS`)
+завершает всю работу с тем же типом исключения. Результаты собираются в
+порядке входа, поэтому не зависят от числа рабочих и сбоев.
+
+Сообщения протокола - JSON с длиной в 4 байтах (big-endian).
+Рабочий на другой машине запускается так:
+
+    python -m cluster HOST PORT
+"""
+import asyncio
+import json
+import multiprocessing
+import socket
+import struct
+import sys
+from contextlib import contextmanager
+from typing import (Any, Dict, Iterator, List, Mapping, Optional, Sequence,
+                    Set, Tuple, Type)
+from zlib import crc32
+
+from homework import InfoMessage
+from ingest import Packet
+from parallel import (DEFAULT_SHARD_BYTES, byte_shards, process_chunk,
+                      process_shard)
+from registry import get_workout
+
+DEFAULT_TASK_TIMEOUT: float = 60.0
+DEFAULT_TIMEOUT: float = 3600.0
+DEFAULT_MAX_ATTEMPTS: int = 3
+DATA_ERRORS: Tuple[Type[Exception], ...] = (
+    ValueError, TypeError, ZeroDivisionError, OverflowError)
+
+Task = Dict[str, Any]
+Coefficients = Mapping[str, Mapping[str, float]]
+
+_LENGTH = struct.Struct('>I')
+_MISSING = object()
+
+
+def encode(message: Mapping[str, Any]) -> bytes:
+    """Сообщение протокола с префиксом длины."""
+    body = json.dumps(message).encode('utf-8')
+    return _LENGTH.pack(len(body)) + body
+
+
+def _receive(stream: Any) -> Optional[Dict[str, Any]]:
+    """Прочитать сообщение из блокирующего файла сокета."""
+    prefix = stream.read(_LENGTH.size)
+    if len(prefix) < _LENGTH.size:
+        return None
+    length, = _LENGTH.unpack(prefix)
+    return json.loads(stream.read(length))
+
+
+async def _read(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """Прочитать сообщение из асинхронного потока."""
+    length, = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return json.loads(await reader.readexactly(length))
+
+
+@contextmanager
+def coefficients_applied(coefficients: Coefficients) -> Iterator[None]:
+    """Временно заменить коэффициенты классов тренировок.
+
+    Ключи - коды типов, значения - атрибуты класса и новые значения.
+    """
+    saved = []
+    try:
+        for code, values in coefficients.items():
+            training_class = get_workout(code).training_class
+            for name, value in values.items():
+                if not hasattr(training_class, name):
+                    raise ValueError(f'У {training_class.__name__} нет '
+                                     f'коэффициента {name}')
+                saved.append((training_class, name,
+                              training_class.__dict__.get(name, _MISSING)))
+                setattr(training_class, name, value)
+        yield
+    finally:
+        for training_class, name, value in reversed(saved):
+            if value is _MISSING:
+                delattr(training_class, name)
+            else:
+                setattr(training_class, name, value)
+
+
+def run_task(task: Task) -> List[List[Any]]:
+    """Рассчитать раздел и вернуть поля сообщений."""
+    with coefficients_applied(task.get('coefficients', {})):
+        if task['kind'] == 'range':
+            messages = process_shard(task['path'], task['fmt'],
+                                     (task['start'], task['end']))
+        else:
+            messages = process_chunk([Packet(code, data)
+                                      for code, data in task['packets']])
+    return [[m.training_type, m.duration, m.distance, m.speed, m.calories]
+            for m in messages]
+
+
+def run_worker(host: str, port: int) -> None:
+    """Получать и считать разделы, пока координатор не скажет `stop`.
+
+    Разрыв соединения тоже завершает рабочего: его раздел координатор
+    отдаст другому.
+    """
+    try:
+        with socket.create_connection((host, port)) as connection:
+            stream = connection.makefile('rb')
+            while True:
+                connection.sendall(encode({'op': 'ready'}))
+                message = _receive(stream)
+                if message is None or message['op'] == 'stop':
+                    return
+                reply = _result(message)
+                connection.sendall(encode(reply))
+                if reply['op'] == 'failed':
+                    return
+    except ConnectionError:
+        return
+
+
+def _result(message: Mapping[str, Any]) -> Dict[str, Any]:
+    """Ответ рабочего на задачу: результат, ошибка данных или сбой.
+
+    Ошибка данных (`DATA_ERRORS`) передаётся с именем своего класса.
+    Прочие исключения считаются сбоем рабочего (`failed`): после
+    такого ответа рабочий отключается, а раздел считает другой.
+    """
+    try:
+        return {'op': 'result', 'id': message['id'],
+                'messages': run_task(message['task'])}
+    except DATA_ERRORS as error:
+        return {'op': 'error', 'id': message.get('id'),
+                'error': type(error).__name__, 'message': str(error)}
+    except Exception as error:
+        return {'op': 'failed', 'id': message.get('id'),
+                'message': f'{type(error).__name__}: {error}'}
+
+
+def _data_error(reply: Mapping[str, Any]) -> Exception:
+    """Исключение того же типа, что у рабочего, по ответу `error`."""
+    for error_class in DATA_ERRORS:
+        if error_class.__name__ == reply['error']:
+            return error_class(reply['message'])
+    raise ValueError(f'Неизвестный тип ошибки: {reply["error"]}')
+
+
+class Coordinator:
+    """Раздача разделов рабочим и сбор результатов.
+
+    Если задано число рабочих `workers`, то после подключения всех
+    ожидаемых рабочих отключение последнего из них завершает работу
+    ошибкой: разделы больше некому считать.
+    """
+
+    def __init__(self,
+                 tasks: Sequence[Task],
+                 task_timeout: float = DEFAULT_TASK_TIMEOUT,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 workers: Optional[int] = None,
+                 ) -> None:
+        self.tasks = list(tasks)
+        self.task_timeout = task_timeout
+        self.max_attempts = max_attempts
+        self.expected_workers = workers
+        self.results: Dict[int, List[List[Any]]] = {}
+        self.attempts = [0] * len(self.tasks)
+        self.reassigned = 0
+        self.error: Optional[Exception] = None
+        self._queue: 'asyncio.Queue[Optional[int]]' = asyncio.Queue()
+        for task_id in range(len(self.tasks)):
+            self._queue.put_nowait(task_id)
+        self._done = asyncio.Event()
+        self._workers = 0
+        self._connected = 0
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._handlers: Set['asyncio.Task[None]'] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        if not self.tasks:
+            self._done.set()
+
+    async def start(self, host: str = '127.0.0.1',
+                    port: int = 0) -> Tuple[str, int]:
+        """Начать приём рабочих и вернуть адрес координатора."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        """Остановить приём рабочих и закрыть их соединения."""
+        for writer in self._writers:
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _finish(self, error: Optional[Exception] = None) -> None:
+        """Завершить работу и разбудить ожидающих рабочих."""
+        if self.error is None:
+            self.error = error
+        self._done.set()
+        for _ in range(self._workers):
+            self._queue.put_nowait(None)
+
+    def _retry(self, task_id: int, reason: str = '') -> None:
+        """Вернуть раздел в очередь после сбоя рабочего."""
+        if self.attempts[task_id] >= self.max_attempts:
+            self._finish(RuntimeError(
+                f'Раздел {task_id} не обработан за {self.max_attempts} '
+                f'попыток' + (f': {reason}' if reason else '')))
+            return
+        self.reassigned += 1
+        self._queue.put_nowait(task_id)
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        """Обслужить одного рабочего."""
+        self._workers += 1
+        self._connected += 1
+        self._writers.add(writer)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        task_id = None
+        try:
+            while True:
+                await _read(reader)
+                task_id = None
+                if not self._done.is_set():
+                    task_id = await self._queue.get()
+                if task_id is None:
+                    writer.write(encode({'op': 'stop'}))
+                    await writer.drain()
+                    return
+                self.attempts[task_id] += 1
+                writer.write(encode({'op': 'task', 'id': task_id,
+                                     'task': self.tasks[task_id]}))
+                await writer.drain()
+                reply = await asyncio.wait_for(_read(reader),
+                                               self.task_timeout)
+                accepted, task_id = self._accept(task_id, reply), None
+                if not accepted:
+                    return
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+                ConnectionError, KeyError, TypeError, ValueError):
+            if task_id is not None and not self._done.is_set():
+                self._retry(task_id)
+        finally:
+            self._workers -= 1
+            self._writers.discard(writer)
+            self._handlers.discard(handler)
+            writer.close()
+            self._check_workers()
+
+    def _accept(self, task_id: int, reply: Mapping[str, Any]) -> bool:
+        """Учесть ответ рабочего; `False` - рабочего нужно отключить."""
+        if reply['op'] == 'error':
+            self._finish(_data_error(reply))
+            return False
+        if reply['op'] == 'failed':
+            if not self._done.is_set():
+                self._retry(task_id, reply['message'])
+            return False
+        self.results[task_id] = list(reply['messages'])
+        if len(self.results) == len(self.tasks):
+            self._finish()
+        return True
+
+    def _check_workers(self) -> None:
+        """Завершить работу ошибкой, если не осталось рабочих."""
+        if (self.expected_workers is not None and not self._workers
+                and self._connected >= self.expected_workers
+                and not self._done.is_set()):
+            self._finish(RuntimeError('Все рабочие отключились, '
+                                      'не обработав разделы'))
+
+    async def wait(self) -> List[List[List[Any]]]:
+        """Дождаться всех разделов и вернуть результаты по порядку."""
+        await self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return [self.results[task_id] for task_id in range(len(self.tasks))]
+
+
+def start_workers(count: int, host: str,
+                  port: int) -> List[multiprocessing.Process]:
+    """Запустить `count` локальных рабочих процессов."""
+    processes = [multiprocessing.Process(target=run_worker,
+                                         args=(host, port), daemon=True)
+                 for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def run_local(tasks: Sequence[Task],
+              workers: int = 2,
+              task_timeout: float = DEFAULT_TASK_TIMEOUT,
+              timeout: Optional[float] = DEFAULT_TIMEOUT,
+              ) -> List[List[List[Any]]]:
+    """Обработать разделы координатором и локальными рабочими.
+
+    Если все рабочие отключились или работа не закончилась за
+    `timeout` секунд, возбуждается исключение.
+    """
+    processes: List[multiprocessing.Process] = []
+
+    async def coordinate() -> List[List[List[Any]]]:
+        coordinator = Coordinator(tasks, task_timeout, workers=workers)
+        host, port = await coordinator.start()
+        if tasks:
+            processes.extend(start_workers(workers, host, port))
+        try:
+            return await asyncio.wait_for(coordinator.wait(), timeout)
+        finally:
+            await coordinator.close()
+
+    try:
+        return asyncio.run(coordinate())
+    finally:
+        for process in processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+
+
+def range_tasks(path: str, fmt: str = 'csv',
+                shard_bytes: int = DEFAULT_SHARD_BYTES) -> List[Task]:
+    """Разделы файла по диапазонам байт."""
+    return [{'kind': 'range', 'path': path, 'fmt': fmt,
+             'start': start, 'end': end}
+            for start, end in byte_shards(path, shard_bytes)]
+
+
+def athlete_partitions(packets: Sequence[Packet],
+                       partitions: int) -> List[List[int]]:
+    """Номера пакетов по разделам; спортсмен всегда в одном разделе."""
+    if partitions < 1:
+        raise ValueError('Число разделов должно быть положительным')
+    groups: List[List[int]] = [[] for _ in range(partitions)]
+    for index, packet in enumerate(packets):
+        groups[crc32(packet.athlete.encode('utf-8')) % partitions].append(
+            index)
+    return [group for group in groups if group]
+
+
+def _messages(rows: List[List[Any]]) -> List[InfoMessage]:
+    return [InfoMessage(*row) for row in rows]
+
+
+def process_file(path: str,
+                 fmt: str = 'csv',
+                 workers: int = 2,
+                 shard_bytes: int = DEFAULT_SHARD_BYTES,
+                 coefficients: Optional[Coefficients] = None,
+                 **options: Any) -> List[InfoMessage]:
+    """Обработать файл по диапазонам байт в порядке строк файла."""
+    tasks = range_tasks(path, fmt, shard_bytes)
+    for task in tasks:
+        task['coefficients'] = coefficients or {}
+    return [info for rows in run_local(tasks, workers, **options)
+            for info in _messages(rows)]
+
+
+def process_by_athlete(packets: Sequence[Packet],
+                       partitions: int = 4,
+                       workers: int = 2,
+                       coefficients: Optional[Coefficients] = None,
+                       **options: Any) -> List[InfoMessage]:
+    """Обработать пакеты, разделив их по спортсменам.
+
+    Сообщения возвращаются в порядке входных пакетов.
+    """
+    groups = athlete_partitions(packets, partitions)
+    tasks = [{'kind': 'packets', 'coefficients': coefficients or {},
+              'packets': [[packets[i].workout_type, packets[i].data]
+                          for i in group]}
+             for group in groups]
+    result: List[Any] = [None] * len(packets)
+    for group, rows in zip(groups, run_local(tasks, workers, **options)):
+        for index, info in zip(group, _messages(rows)):
+            result[index] = info
+    return result
+
+
+if __name__ == '__main__':
+    run_worker(sys.argv[1], int(sys.argv[2]))
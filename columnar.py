@@ -0,0 +1,290 @@
+"""Столбцовая выгрузка рассчитанных сообщений для аналитики.
+
+Поля `InfoMessage` пишутся порциями по столбцам с полной точностью.
+Если установлен `pyarrow`, доступны Arrow IPC и Parquet; без него
+используется собственный формат FTCL:
+
+    b'FTCL' | версия u16 | длина схемы u32 | схема JSON
+    порции: строк u32 | столбцы по схеме
+    конец: порция из 0 строк
+
+Столбец float64 - `строк * 8` байт little-endian. Столбец строк
+`dict<utf8>` - словарь порции (u16 количество, затем u16 длина и
+UTF-8 каждой строки) и коды u16 по строкам. Читатель грузит столбцы
+через `array.frombytes`, без разбора текста.
+
+Выгрузка пишется во временный файл `<имя>.part` и переименовывается
+в него только после успешного закрытия, поэтому прерванная выгрузка не
+выглядит как полный файл.
+"""
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import (Any, BinaryIO, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+
+from homework import InfoMessage
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+MAGIC = b'FTCL'
+VERSION: int = 1
+DEFAULT_CHUNK_SIZE: int = 65536
+NUMBER_FIELDS: Tuple[str, ...] = ('duration', 'distance', 'speed', 'calories')
+SCHEMA: List[Dict[str, str]] = [
+    {'name': 'training_type', 'type': 'dict<utf8>'},
+    *({'name': name, 'type': 'float64'} for name in NUMBER_FIELDS),
+]
+FORMATS: Tuple[str, ...] = ('ftcl', 'arrow', 'parquet')
+PARTIAL_SUFFIX: str = '.part'
+
+_PREFIX = struct.Struct('<4sHI')
+_U32 = struct.Struct('<I')
+_U16 = struct.Struct('<H')
+_SWAP = sys.byteorder != 'little'
+
+
+def _float_bytes(values: array) -> bytes:
+    """Байты столбца float64 в порядке little-endian."""
+    if _SWAP:
+        values = array('d', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _dictionary(values: List[str]) -> Tuple[List[str], array]:
+    """Словарь различных строк и коды строк по нему."""
+    lookup: Dict[str, int] = {}
+    indexes = [lookup.setdefault(value, len(lookup)) for value in values]
+    if len(lookup) > 0xFFFF:
+        raise ValueError('Слишком много различных типов тренировок '
+                         'в одной порции')
+    codes = array('H', indexes)
+    if _SWAP:
+        codes.byteswap()
+    return list(lookup), codes
+
+
+class ColumnarWriter:
+    """Потоковая запись сообщений по столбцам порциями."""
+
+    def __init__(self, path: str, fmt: str = 'ftcl',
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f'{fmt} - неизвестный формат выгрузки;'
+                             f' используйте: {", ".join(FORMATS)}')
+        if fmt != 'ftcl' and pyarrow is None:
+            raise ValueError(f'Для формата {fmt} нужен пакет pyarrow')
+        if chunk_size < 1:
+            raise ValueError('Размер порции должен быть положительным')
+        self.fmt = fmt
+        self.path = path
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._types: List[str] = []
+        self._numbers = {name: array('d') for name in NUMBER_FIELDS}
+        self._stream: Optional[BinaryIO] = None
+        self._arrow: Any = None
+        self._partial: Optional[str] = path + PARTIAL_SUFFIX
+        try:
+            if fmt == 'ftcl':
+                self._stream = open(self._partial, 'wb')
+                schema = json.dumps({'columns': SCHEMA}).encode('utf-8')
+                self._stream.write(_PREFIX.pack(MAGIC, VERSION,
+                                                len(schema)))
+                self._stream.write(schema)
+            else:
+                self._arrow = _arrow_writer(self._partial, fmt)
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, info: InfoMessage) -> None:
+        """Добавить одно сообщение."""
+        self.write_many((info,))
+
+    def write_many(self, messages: Iterable[InfoMessage]) -> None:
+        """Добавить сообщения, выгружая полные порции."""
+        types, numbers = self._types, self._numbers
+        duration, distance = numbers['duration'], numbers['distance']
+        speed, calories = numbers['speed'], numbers['calories']
+        size = self.chunk_size
+        for info in messages:
+            types.append(info.training_type)
+            duration.append(info.duration)
+            distance.append(info.distance)
+            speed.append(info.speed)
+            calories.append(info.calories)
+            if len(types) >= size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Выгрузить накопленную порцию."""
+        rows = len(self._types)
+        if not rows:
+            return
+        if self._arrow is not None:
+            self._arrow.write_batch(_arrow_batch(self._types, self._numbers))
+        else:
+            self._write_chunk(rows)
+        self.count += rows
+        del self._types[:]
+        for values in self._numbers.values():
+            del values[:]
+
+    def _write_chunk(self, rows: int) -> None:
+        """Записать порцию в формате FTCL."""
+        names, codes = _dictionary(self._types)
+        parts = [_U32.pack(rows), _U16.pack(len(names))]
+        for name in names:
+            encoded = name.encode('utf-8')
+            parts.append(_U16.pack(len(encoded)))
+            parts.append(encoded)
+        parts.append(codes.tobytes())
+        parts.extend(_float_bytes(self._numbers[name])
+                     for name in NUMBER_FIELDS)
+        self._stream.write(b''.join(parts))
+
+    def close(self) -> None:
+        """Выгрузить остаток, закрыть файл и дать ему целевое имя."""
+        if self._partial is None:
+            return
+        try:
+            self.flush()
+            if self._arrow is not None:
+                self._arrow.close()
+                self._arrow = None
+            if self._stream is not None:
+                self._stream.write(_U32.pack(0))
+                self._stream.close()
+                self._stream = None
+            os.replace(self._partial, self.path)
+            self._partial = None
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        """Бросить выгрузку: закрыть и удалить временный файл."""
+        for handle in (self._arrow, self._stream):
+            if handle is not None:
+                try:
+                    handle.close()
+                except (OSError, ValueError):
+                    pass
+        self._arrow = self._stream = None
+        if self._partial is not None:
+            try:
+                os.remove(self._partial)
+            except OSError:
+                pass
+            self._partial = None
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, exc_type: Optional[type], *args: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _arrow_schema() -> Any:
+    return pyarrow.schema(
+        [('training_type', pyarrow.dictionary(pyarrow.int16(),
+                                              pyarrow.utf8()))]
+        + [(name, pyarrow.float64()) for name in NUMBER_FIELDS])
+
+
+def _arrow_writer(path: str, fmt: str) -> Any:
+    """Писатель Arrow IPC или Parquet."""
+    if fmt == 'parquet':
+        return pyarrow.parquet.ParquetWriter(path, _arrow_schema())
+    return pyarrow.ipc.new_file(path, _arrow_schema())
+
+
+def _arrow_batch(types: List[str], numbers: Dict[str, array]) -> Any:
+    """Порция в виде `pyarrow.RecordBatch`."""
+    training_type = pyarrow.array(types).dictionary_encode().cast(
+        pyarrow.dictionary(pyarrow.int16(), pyarrow.utf8()))
+    return pyarrow.RecordBatch.from_arrays(
+        [training_type, *(pyarrow.array(numbers[name], pyarrow.float64())
+                          for name in NUMBER_FIELDS)],
+        schema=_arrow_schema())
+
+
+def write_columns(messages: Iterable[InfoMessage], path: str,
+                  fmt: str = 'ftcl',
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Выгрузить все сообщения и вернуть их количество."""
+    with ColumnarWriter(path, fmt, chunk_size) as writer:
+        writer.write_many(messages)
+    return writer.count
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError('Файл FTCL обрезан')
+    return data
+
+
+def _read_float_column(stream: BinaryIO, rows: int) -> array:
+    values = array('d')
+    values.frombytes(_read_exact(stream, rows * 8))
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def iter_chunks(path: str) -> Iterator[Dict[str, Any]]:
+    """Порции файла FTCL: словари столбцов.
+
+    Числовые столбцы - `array('d')`, столбец `training_type` -
+    список строк.
+    """
+    with open(path, 'rb') as stream:
+        magic, version, length = _PREFIX.unpack(
+            _read_exact(stream, _PREFIX.size))
+        if (magic, version) != (MAGIC, VERSION):
+            raise ValueError(f'{path} не является файлом FTCL '
+                             f'версии {VERSION}')
+        schema = json.loads(_read_exact(stream, length))['columns']
+        if schema != SCHEMA:
+            raise ValueError(f'Неподдерживаемая схема файла {path}')
+        while True:
+            rows, = _U32.unpack(_read_exact(stream, _U32.size))
+            if not rows:
+                return
+            count, = _U16.unpack(_read_exact(stream, _U16.size))
+            names = []
+            for _ in range(count):
+                size, = _U16.unpack(_read_exact(stream, _U16.size))
+                names.append(_read_exact(stream, size).decode('utf-8'))
+            codes = array('H')
+            codes.frombytes(_read_exact(stream, rows * 2))
+            if _SWAP:
+                codes.byteswap()
+            chunk: Dict[str, Any] = {
+                'training_type': [names[code] for code in codes]}
+            for name in NUMBER_FIELDS:
+                chunk[name] = _read_float_column(stream, rows)
+            yield chunk
+
+
+def read_columns(path: str) -> Dict[str, Any]:
+    """Все столбцы файла FTCL целиком."""
+    columns: Dict[str, Any] = {'training_type': []}
+    columns.update((name, array('d')) for name in NUMBER_FIELDS)
+    for chunk in iter_chunks(path):
+        for name, values in chunk.items():
+            columns[name].extend(values)
+    return columns
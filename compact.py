@@ -0,0 +1,179 @@
+"""Компактное хранение тренировок: классы со `__slots__` и массивы.
+
+Классы из `homework` остаются обычными: у их экземпляров есть
+`__dict__`, и атрибуты можно подменять. Для хранения миллионов
+тренировок здесь строятся их варианты со `__slots__` с теми же
+формулами и `TrainingBatch`, который держит тренировки одного типа
+в типизированных массивах.
+"""
+import inspect
+from array import array
+from typing import (Any, Dict, Iterable, Iterator, List, Sequence, Tuple,
+                    Type)
+
+from batch import BatchResult, compute_batch, iter_messages
+from homework import InfoMessage, Training
+from registry import get_workout
+
+_SKIP_ATTRIBUTES = frozenset(('__dict__', '__weakref__', '__slots__',
+                              '__init__', '__module__', '__init_subclass__',
+                              '_metrics'))
+
+
+def _init_fields(training_class: Type[Training]) -> Tuple[str, ...]:
+    """Имена параметров конструктора класса тренировки."""
+    parameters = inspect.signature(training_class.__init__).parameters
+    return tuple(parameters)[1:]
+
+
+def _make_init(fields: Tuple[str, ...], class_name: str) -> Any:
+    """Создать конструктор, заполняющий слоты по порядку полей."""
+    def __init__(self: Any, *args: float) -> None:
+        if len(args) != len(fields):
+            raise TypeError(f'{class_name}() принимает {len(fields)} '
+                            f'аргументов, передано {len(args)}')
+        for name, value in zip(fields, args):
+            setattr(self, name, value)
+        self._metrics = None
+    return __init__
+
+
+def slotted(training_class: Type[Training], base: type) -> type:
+    """Построить вариант класса тренировки со `__slots__`.
+
+    Формулы и коэффициенты копируются из пространства имён исходного
+    класса, а новые поля конструктора и кэш показателей становятся
+    слотами. Имя класса сохраняется, поэтому `show_training_info`
+    сообщает прежний тип.
+    """
+    fields = _init_fields(training_class)
+    inherited = set(getattr(base, '_fields', ()))
+    namespace: Dict[str, Any] = {
+        name: value for name, value in vars(training_class).items()
+        if name not in _SKIP_ATTRIBUTES
+    }
+    slots = tuple(f for f in fields if f not in inherited)
+    if base is object:
+        slots += ('_metrics',)
+    namespace['__slots__'] = slots
+    namespace['__init__'] = _make_init(fields, training_class.__name__)
+    namespace['__module__'] = __name__
+    namespace['_fields'] = fields
+    return type(training_class.__name__, (base,), namespace)
+
+
+SlotTraining = slotted(Training, object)
+SLOTTED: Dict[Type[Training], type] = {}
+
+
+def slotted_class(training_class: Type[Training]) -> type:
+    """Вариант класса со `__slots__`, построенный один раз."""
+    variant = SLOTTED.get(training_class)
+    if variant is None:
+        parent = training_class.__bases__[0]
+        base = (SlotTraining if parent is Training
+                else slotted_class(parent))
+        variant = SLOTTED[training_class] = slotted(training_class, base)
+    return variant
+
+
+def read_package_slotted(workout_type: str, data: Sequence[float]) -> Any:
+    """Аналог `read_package`, создающий тренировку со `__slots__`."""
+    training_class = get_workout(workout_type).training_class
+    return slotted_class(training_class)(*data)
+
+
+def _column_property(name: str) -> property:
+    """Свойство строки пакета, читающее и пишущее в столбец."""
+    def getter(self: Any) -> float:
+        return self._batch._columns[name][self._index]
+
+    def setter(self: Any, value: float) -> None:
+        self._batch._columns[name][self._index] = value
+    return property(getter, setter)
+
+
+_ROW_CLASSES: Dict[Type[Training], type] = {}
+
+
+def _row_class(training_class: Type[Training]) -> type:
+    """Класс представления строки пакета для типа тренировки."""
+    row_class = _ROW_CLASSES.get(training_class)
+    if row_class is None:
+        namespace: Dict[str, Any] = {
+            name: _column_property(name)
+            for name in _init_fields(training_class)
+        }
+        namespace['__slots__'] = ('_batch', '_index')
+        row_class = type(training_class.__name__, (training_class,),
+                         namespace)
+        _ROW_CLASSES[training_class] = row_class
+    return row_class
+
+
+class TrainingBatch:
+    """Тренировки одного типа в непрерывных массивах `float64`.
+
+    Каждое поле конструктора хранится отдельным `array('d')`, то есть
+    по 8 байт на значение. Индексация возвращает представление строки:
+    объект класса тренировки, поля которого читаются из массивов.
+    """
+
+    def __init__(self, workout_type: str,
+                 rows: Iterable[Sequence[float]] = ()) -> None:
+        workout = get_workout(workout_type)
+        self.workout_type = workout_type
+        self.training_class: Type[Training] = workout.training_class
+        self.fields: Tuple[str, ...] = workout.fields
+        self._columns: Dict[str, array] = {
+            name: array('d') for name in self.fields
+        }
+        self._row_class = _row_class(self.training_class)
+        self.extend(rows)
+
+    def __len__(self) -> int:
+        return len(self._columns['action'])
+
+    def __getitem__(self, index: int) -> Training:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('Номер строки вне пакета')
+        row = self._row_class.__new__(self._row_class)
+        row._batch = self
+        row._index = index
+        return row
+
+    def __iter__(self) -> Iterator[Training]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, data: Sequence[float]) -> None:
+        """Добавить тренировку по данным пакета."""
+        if len(data) != len(self.fields):
+            raise TypeError(f'{self.training_class.__name__} принимает '
+                            f'{len(self.fields)} полей, передано '
+                            f'{len(data)}')
+        for name, value in zip(self.fields, data):
+            self._columns[name].append(value)
+
+    def extend(self, rows: Iterable[Sequence[float]]) -> None:
+        """Добавить несколько тренировок."""
+        for data in rows:
+            self.append(data)
+
+    def column(self, name: str) -> array:
+        """Столбец поля тренировки."""
+        return self._columns[name]
+
+    def compute(self) -> BatchResult:
+        """Рассчитать показатели всех тренировок пакетным движком."""
+        codes = [self.workout_type] * len(self)
+        return compute_batch(codes, **self._columns)
+
+    def show_training_info(self) -> List[InfoMessage]:
+        """Информационные сообщения для всех тренировок пакета."""
+        codes = [self.workout_type] * len(self)
+        return list(iter_messages(codes, self._columns['duration'],
+                                  self.compute()))
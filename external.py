@@ -0,0 +1,309 @@
+"""Группировка и сортировка результатов больше оперативной памяти.
+
+Строки копятся в памяти до предела `memory_limit` байт (по оценке
+размера первой строки), затем сортируются и сбрасываются во временный
+файл - серию. Серии сливаются `heapq.merge` порциями, поэтому в памяти
+одновременно находится не больше одной серии. Если серий больше
+`fan_in`, они сливаются в несколько проходов.
+"""
+import heapq
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Sequence, Tuple)
+
+from aggregate import Totals
+from ingest import Packet, iter_results
+from store import PERIODS
+
+DEFAULT_MEMORY_LIMIT: int = 64 * 1024 * 1024
+DEFAULT_FAN_IN: int = 64
+MERGE_COST: int = 2048
+GROUP_FIELDS: Tuple[str, ...] = ('athlete', 'training_type', 'period')
+_TOTALS_SIZE = sys.getsizeof(Totals()) + 4 * sys.getsizeof(0.0) + 100
+
+
+class Row(NamedTuple):
+    """Рассчитанная тренировка спортсмена."""
+
+    athlete: str
+    timestamp: float
+    training_type: str
+    duration: float
+    distance: float
+    speed: float
+    calories: float
+
+
+@dataclass
+class SpillStats:
+    """Счётчики сброса на диск."""
+
+    runs: int = 0
+    spilled: int = 0
+    merge_passes: int = 0
+
+
+def iter_rows(packets: Iterable[Packet]) -> Iterator[Row]:
+    """Рассчитать пакеты через `iter_info` в строки."""
+    for packet, info in iter_results(packets):
+        yield Row(packet.athlete, packet.timestamp, info.training_type,
+                  info.duration, info.distance, info.speed, info.calories)
+
+
+def _size(item: Any) -> int:
+    """Оценка памяти, занимаемой кортежем и его элементами."""
+    if isinstance(item, tuple):
+        return sys.getsizeof(item) + sum(_size(value) for value in item)
+    return sys.getsizeof(item)
+
+
+class _Spill:
+    """Серии во временном каталоге и их слияние.
+
+    Серия хранится в файле `<номер>.run` и открывается только на время
+    записи и чтения, поэтому буферы ввода-вывода есть не больше чем у
+    `fan_in` файлов сразу, а в памяти от серии остаётся только номер.
+    """
+
+    def __init__(self, batch: int, fan_in: int, buffering: int,
+                 tmpdir: Optional[str], stats: SpillStats) -> None:
+        self.batch = max(1, batch)
+        self.fan_in = max(2, fan_in)
+        self.buffering = buffering
+        self.directory = tempfile.mkdtemp(prefix='external-', dir=tmpdir)
+        self.stats = stats
+        self.runs: List[int] = []
+        self._next = 0
+
+    def path(self, run: int) -> str:
+        """Путь к файлу серии."""
+        return os.path.join(self.directory, f'{run}.run')
+
+    def write(self, items: Iterable[Any]) -> None:
+        """Записать отсортированную серию порциями по `batch`."""
+        run = self._next
+        self._next += 1
+        self.runs.append(run)
+        with open(self.path(run), 'wb', buffering=self.buffering) as stream:
+            iterator = iter(items)
+            while True:
+                chunk = list(islice(iterator, self.batch))
+                if not chunk:
+                    break
+                pickle.dump(chunk, stream, pickle.HIGHEST_PROTOCOL)
+                self.stats.spilled += len(chunk)
+        self.stats.runs += 1
+
+    def read(self, run: int) -> Iterator[Any]:
+        """Прочитать серию и удалить её файл."""
+        path = self.path(run)
+        try:
+            with open(path, 'rb', buffering=self.buffering) as stream:
+                while True:
+                    try:
+                        chunk = pickle.load(stream)
+                    except EOFError:
+                        return
+                    yield from chunk
+        finally:
+            os.remove(path)
+
+    def merge(self, key: Callable[[Any], Any],
+              reverse: bool = False) -> Iterator[Any]:
+        """Слить все серии, при необходимости в несколько проходов."""
+        while len(self.runs) > self.fan_in:
+            runs, self.runs = self.runs, []
+            for start in range(0, len(runs), self.fan_in):
+                group = runs[start:start + self.fan_in]
+                self.write(heapq.merge(*map(self.read, group), key=key,
+                                       reverse=reverse))
+            self.stats.merge_passes += 1
+        runs, self.runs = self.runs, []
+        if runs:
+            self.stats.merge_passes += 1
+        return heapq.merge(*map(self.read, runs), key=key, reverse=reverse)
+
+    def close(self) -> None:
+        """Удалить временный каталог с оставшимися сериями."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.runs = []
+
+
+def _spill(capacity: int, memory_limit: int, fan_in: int,
+           tmpdir: Optional[str], stats: Optional[SpillStats]) -> _Spill:
+    """Серии с порциями и буферами, при слиянии умещающимися в предел.
+
+    На открытую при слиянии серию приходится не меньше `MERGE_COST`
+    байт, поэтому при малом пределе `fan_in` уменьшается.
+    """
+    fan_in = max(2, min(fan_in, memory_limit // (4 * MERGE_COST)))
+    return _Spill(capacity // fan_in, fan_in, MERGE_COST // 2, tmpdir,
+                  stats or SpillStats())
+
+
+def _capacity(first: Any, memory_limit: int, extra: int = 0) -> int:
+    """Сколько элементов размера `first` помещается в предел памяти.
+
+    Половина предела оставляется на буферы слияния и накладные
+    расходы; `extra` - память на элемент сверх самого `first`.
+    """
+    if memory_limit < 1:
+        raise ValueError('Предел памяти должен быть положительным')
+    return max(1, memory_limit // 2 // (_size(first) + extra + 8))
+
+
+def external_sort(rows: Iterable[Row],
+                  by: str = 'calories',
+                  reverse: bool = False,
+                  memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                  tmpdir: Optional[str] = None,
+                  fan_in: int = DEFAULT_FAN_IN,
+                  stats: Optional[SpillStats] = None,
+                  ) -> Iterator[Row]:
+    """Отсортировать строки по полю `by`.
+
+    Сортировка устойчивая: результат совпадает с `sorted`.
+    """
+    if by not in Row._fields:
+        raise ValueError(f'{by} - неизвестное поле;'
+                         f' используйте: {", ".join(Row._fields)}')
+    key = itemgetter(Row._fields.index(by))
+    iterator = iter(rows)
+    first = next(iterator, None)
+    if first is None:
+        return
+    capacity = _capacity(first, memory_limit)
+    spill = _spill(capacity, memory_limit, fan_in, tmpdir, stats)
+    try:
+        buffer = [first]
+        for row in iterator:
+            buffer.append(row)
+            if len(buffer) >= capacity:
+                buffer.sort(key=key, reverse=reverse)
+                spill.write(map(tuple, buffer))
+                buffer = []
+        buffer.sort(key=key, reverse=reverse)
+        if not spill.runs:
+            yield from buffer
+            return
+        spill.write(map(tuple, buffer))
+        del buffer
+        for row in spill.merge(key, reverse):
+            yield Row._make(row)
+    finally:
+        spill.close()
+
+
+def _group_key(fields: Sequence[str],
+               period: str) -> Callable[[Row], Tuple[str, ...]]:
+    """Функция ключа группировки строки."""
+    fmt = PERIODS[period]
+    getters = {
+        'athlete': itemgetter(0),
+        'training_type': itemgetter(2),
+        'period': lambda row: time.strftime(fmt, time.gmtime(row[1])),
+    }
+    parts = [getters[name] for name in fields]
+    return lambda row: tuple(part(row) for part in parts)
+
+
+def _sorted_states(groups: Dict[Tuple[str, ...], Totals],
+                   ) -> Iterator[Tuple[Tuple[str, ...], List[float]]]:
+    """Состояния итогов по возрастанию ключа без копии словаря."""
+    for key in sorted(groups):
+        yield key, groups[key].state()
+
+
+def _combine(items: Iterable[Tuple[Any, List[float]]],
+             ) -> Iterator[Tuple[Any, List[float]]]:
+    """Сложить частичные итоги соседних элементов с равным ключом."""
+    for key, group in groupby(items, key=itemgetter(0)):
+        state = [0, 0.0, 0.0, 0.0]
+        for _, partial in group:
+            state = [a + b for a, b in zip(state, partial)]
+        yield key, state
+
+
+def _partial_runs(rows: Iterable[Row],
+                  group_key: Callable[[Row], Tuple[str, ...]],
+                  memory_limit: int,
+                  spill_factory: Callable[[int], _Spill],
+                  ) -> Tuple[Dict[Tuple[str, ...], Totals], Optional[_Spill]]:
+    """Накопить частичные итоги, сбрасывая их сериями при переполнении.
+
+    Возвращает группы, оставшиеся в памяти, и серии на диске, если
+    сброс понадобился.
+    """
+    spill: Optional[_Spill] = None
+    groups: Dict[Tuple[str, ...], Totals] = {}
+    capacity = 0
+    try:
+        for row in rows:
+            key = group_key(row)
+            totals = groups.get(key)
+            if totals is None:
+                if not capacity:
+                    capacity = _capacity(key, memory_limit, _TOTALS_SIZE)
+                if len(groups) >= capacity:
+                    if spill is None:
+                        spill = spill_factory(capacity)
+                    spill.write(_sorted_states(groups))
+                    groups = {}
+                totals = groups[key] = Totals()
+            totals.add(row[3], row[4], row[6])
+    except BaseException:
+        if spill is not None:
+            spill.close()
+        raise
+    return groups, spill
+
+
+def _check_group_by(by: Sequence[str], period: str) -> None:
+    """Проверить поля группировки и период."""
+    for name in by:
+        if name not in GROUP_FIELDS:
+            raise ValueError(f'{name} - неизвестное поле группировки;'
+                             f' используйте: {", ".join(GROUP_FIELDS)}')
+    if period not in PERIODS:
+        raise ValueError(f'{period} - неизвестный период;'
+                         f' используйте: {", ".join(PERIODS)}')
+
+
+def external_group_by(rows: Iterable[Row],
+                      by: Sequence[str] = GROUP_FIELDS,
+                      period: str = 'year',
+                      memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                      tmpdir: Optional[str] = None,
+                      fan_in: int = DEFAULT_FAN_IN,
+                      stats: Optional[SpillStats] = None,
+                      ) -> Iterator[Tuple[Tuple[str, ...], dict]]:
+    """Итоги `Totals.as_dict` по группам в порядке ключей.
+
+    Группы копятся в словаре частичных итогов; когда он достигает
+    предела памяти, он сбрасывается на диск серией, отсортированной
+    по ключу.
+    """
+    _check_group_by(by, period)
+    groups, spill = _partial_runs(
+        rows, _group_key(by, period), memory_limit,
+        lambda capacity: _spill(capacity, memory_limit, fan_in, tmpdir,
+                                stats))
+    try:
+        items = _sorted_states(groups)
+        if spill is not None:
+            spill.write(items)
+            groups = {}
+            items = _combine(spill.merge(itemgetter(0)))
+        for key, state in items:
+            yield key, Totals(*state).as_dict()
+    finally:
+        if spill is not None:
+            spill.close()
@@ -1,32 +1,163 @@
-from dataclasses import asdict, dataclass
-from typing import Dict, List, Type
+import inspect
+from dataclasses import dataclass
+from functools import wraps
+from operator import attrgetter
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
+
+from registry import get_workout, register_workout
 
 
 @dataclass
 class InfoMessage:
     """Информационное сообщение о тренировке."""
 
+    __slots__ = ('training_type', 'duration', 'distance', 'speed', 'calories')
+
     training_type: str
     duration: float
     distance: float
     speed: float
     calories: float
-    TEXT_MES: str = ('Тип тренировки: {training_type}; '
-                     'Длительность: {duration:.3f} ч.; '
-                     'Дистанция: {distance:.3f} км; '
-                     'Ср. скорость: {speed:.3f} км/ч; '
-                     'Потрачено ккал: {calories:.3f}.')
+    TEXT_MES: ClassVar[str] = ('Тип тренировки: {training_type}; '
+                               'Длительность: {duration:.3f} ч.; '
+                               'Дистанция: {distance:.3f} км; '
+                               'Ср. скорость: {speed:.3f} км/ч; '
+                               'Потрачено ккал: {calories:.3f}.')
 
     def get_message(self) -> str:
-        return self.TEXT_MES.format(**asdict(self))
+        return self.TEXT_MES.format(training_type=self.training_type,
+                                    duration=self.duration,
+                                    distance=self.distance,
+                                    speed=self.speed,
+                                    calories=self.calories)
+
+
+@dataclass
+class CacheStats:
+    """Счётчики обращений к кэшу показателей тренировок."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self) -> None:
+        self.hits = self.misses = 0
+
+
+metric_cache_stats = CacheStats()
+_setattr = object.__setattr__
+METRIC_METHODS = ('get_distance', 'get_mean_speed', 'get_spent_calories')
+
+
+def cached_metric(method: Callable[[Any], float]) -> Callable[[Any], float]:
+    """Кэшировать показатель тренировки до изменения её полей.
+
+    Кэш хранится вместе со значениями полей конструктора и
+    коэффициентов класса, по которым он посчитан, и сбрасывается,
+    как только какое-либо из них изменится.
+    """
+    name = method.__name__
+    stats = metric_cache_stats
+
+    @wraps(method)
+    def wrapper(self: Any) -> float:
+        inputs = self._metric_inputs(self)
+        cache = self._metrics
+        if cache is None or cache[0] != inputs:
+            cache = (inputs, {})
+            _setattr(self, '_metrics', cache)
+        else:
+            values = cache[1]
+            if name in values:
+                stats.hits += 1
+                return values[name]
+        stats.misses += 1
+        value = cache[1][name] = method(self)
+        return value
+
+    wrapper.cached_metric = True
+    return wrapper
+
+
+def coefficient_names(training_class: type) -> List[str]:
+    """Имена числовых коэффициентов класса."""
+    return sorted(
+        name for name in dir(training_class)
+        if name.isupper()
+        and isinstance(getattr(training_class, name), (int, float))
+        and not isinstance(getattr(training_class, name), bool))
+
+
+def _input_getter(training_class: type) -> Callable[[Any], tuple]:
+    """Функция, возвращающая значения полей и коэффициентов."""
+    fields = list(inspect.signature(training_class.__init__).parameters)[1:]
+    return attrgetter(*fields, *coefficient_names(training_class))
+
+
+def _install_metric_cache(training_class: type) -> None:
+    """Поставить или снять обёртки кэша по флагу `CACHE_METRICS`.
+
+    Унаследованные методы оборачиваются в самом классе, если флаг
+    включён только у него.
+    """
+    training_class._metric_inputs = staticmethod(
+        _input_getter(training_class))
+    for name in METRIC_METHODS:
+        current = getattr(training_class, name, None)
+        if not callable(current):
+            continue
+        method = current
+        if getattr(method, 'cached_metric', False):
+            method = method.__wrapped__
+        if training_class.CACHE_METRICS:
+            method = cached_metric(method)
+        if method is not current or name in vars(training_class):
+            setattr(training_class, name, method)
+
+
+def set_metric_cache(enabled: bool,
+                     training_class: Optional[type] = None) -> None:
+    """Включить или выключить кэш показателей класса и подклассов.
+
+    По умолчанию флаг меняется у `Training`, то есть у всех классов,
+    не задавших `CACHE_METRICS` у себя.
+    """
+    training_class = training_class or Training
+    training_class.CACHE_METRICS = enabled
+    classes = [training_class]
+    while classes:
+        current = classes.pop()
+        _install_metric_cache(current)
+        classes.extend(current.__subclasses__())
 
 
 class Training:
-    """Базовый класс тренировки."""
+    """Базовый класс тренировки.
+
+    Если `CACHE_METRICS` включён, дистанция, скорость и калории
+    вычисляются один раз и кэшируются до изменения полей конструктора
+    (`action`, `duration`, `weight` и полей подклассов) или
+    коэффициентов класса. По умолчанию кэш выключен: формулы дешевле
+    проверки кэша, и он окупается только при многократных обращениях.
+    Флаг проверяется при создании класса; чтобы переключить его
+    позже, используйте `set_metric_cache`. С выключенным кэшем методы
+    остаются без обёрток.
+    """
 
     LEN_STEP: float = 0.65
     M_IN_KM: float = 1000
     MINUTES: float = 60
+    CACHE_METRICS: bool = False
+    _metrics: Optional[Tuple[tuple, Dict[str, float]]] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Настроить кэш показателей для подкласса."""
+        super().__init_subclass__(**kwargs)
+        _install_metric_cache(cls)
 
     def __init__(self,
                  action: float,
@@ -58,6 +189,9 @@ class Training:
                            self.get_spent_calories())
 
 
+_install_metric_cache(Training)
+
+
 class Running(Training):
     """Тренировка: бег."""
 
@@ -123,18 +257,26 @@ class Swimming(Training):
                 / self.M_IN_KM / self.duration)
 
 
+register_workout('SWM', Swimming,
+                 ('action', 'duration', 'weight', 'length_pool', 'count_pool'),
+                 speed='length_pool * count_pool / M_IN_KM / duration',
+                 calories=('(speed + COEFF_CALORIE_1)'
+                           ' * COEFF_CALORIE_2 * weight'))
+register_workout('RUN', Running,
+                 ('action', 'duration', 'weight'),
+                 calories=('(COEFF_CALORIE_1 * speed - COEFF_CALORIE_2)'
+                           ' * weight / M_IN_KM * duration * MINUTES'))
+register_workout('WLK', SportsWalking,
+                 ('action', 'duration', 'weight', 'height'),
+                 calories=('(COEFF_CALORIE_1 * weight'
+                           ' + (speed**COEFF_CALORIE_2 // height)'
+                           ' * COEFF_CALORIE_3 * weight)'
+                           ' * duration * MINUTES'))
+
+
 def read_package(workout_type: str, data: List[int]) -> Training:
     """Прочитать данные полученные от датчиков."""
-    code_class: Dict[str, Type[Training]] = {
-        'SWM': Swimming,
-        'RUN': Running,
-        'WLK': SportsWalking
-    }
-    code_list = ", ".join(code_class)
-    if workout_type not in code_class:
-        raise ValueError(f'{workout_type} - неизвестный тип тренировки;'
-                         f' используйте: {code_list}')
-    return code_class[workout_type](*data)
+    return get_workout(workout_type).training_class(*data)
 
 
 def main(training: Training) -> None:
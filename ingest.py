@@ -0,0 +1,179 @@
+"""Потоковое чтение пакетов от датчиков из файлов и stdin."""
+import json
+import sys
+from itertools import islice, tee
+from operator import methodcaller
+from typing import (Callable, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, TextIO, Tuple, TypeVar, Union)
+
+import instrument
+from homework import InfoMessage, Training, read_package
+
+T = TypeVar('T')
+Number = Union[int, float]
+
+DEFAULT_CHUNK_SIZE: int = 1024
+
+
+class Packet(NamedTuple):
+    """Пакет данных от блока датчиков.
+
+    `athlete` и `timestamp` (секунды Unix) необязательны и передаются
+    только в формате JSON-lines.
+    """
+
+    workout_type: str
+    data: List[Number]
+    athlete: str = ''
+    timestamp: float = 0.0
+
+
+def _number(value: str) -> Number:
+    """Преобразовать поле пакета в число, сохраняя целые значения."""
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def parse_csv_line(line: str) -> Optional[Packet]:
+    """Разобрать строку вида `RUN,15000,1,75`."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    workout_type, *fields = line.split(',')
+    return Packet(workout_type.strip(), [_number(f) for f in fields])
+
+
+def parse_json_line(line: str) -> Optional[Packet]:
+    """Разобрать строку вида `{"type": "RUN", "data": [15000, 1, 75]}`.
+
+    Необязательные ключи `athlete` и `timestamp` переносятся в пакет.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    record = json.loads(line)
+    return Packet(record['type'], list(record['data']),
+                  str(record.get('athlete', '')),
+                  float(record.get('timestamp', 0.0)))
+
+
+PARSERS: Dict[str, Callable[[str], Optional[Packet]]] = {
+    'csv': parse_csv_line,
+    'jsonl': parse_json_line,
+}
+
+
+def get_parser(fmt: str) -> Callable[[str], Optional[Packet]]:
+    """Вернуть функцию разбора строки для формата ввода."""
+    if fmt not in PARSERS:
+        raise ValueError(f'{fmt} - неизвестный формат ввода;'
+                         f' используйте: {", ".join(PARSERS)}')
+    return PARSERS[fmt]
+
+
+def open_input(path: str) -> TextIO:
+    """Открыть файл с пакетами; `-` означает stdin."""
+    if path == '-':
+        return sys.stdin
+    return open(path, encoding='utf-8')
+
+
+def iter_packets(lines: Iterable[str], fmt: str = 'csv') -> Iterator[Packet]:
+    """Лениво разобрать пакеты из строк файла или потока."""
+    parse = instrument.wrap('parse', get_parser(fmt))
+    for line in lines:
+        packet = parse(line)
+        if packet is not None:
+            yield packet
+
+
+def iter_trainings(packets: Iterable[Packet]) -> Iterator[Training]:
+    """Создать тренировки по пакетам через `read_package`."""
+    read = instrument.wrap('read_package', read_package)
+    for packet in packets:
+        yield read(packet.workout_type, packet.data)
+
+
+def info_function() -> Callable[[Packet], InfoMessage]:
+    """Функция расчёта сообщения по пакету.
+
+    Стадии `read_package` и `show_training_info` замеряются так же, как
+    в `iter_info`.
+    """
+    read = instrument.wrap('read_package', read_package)
+    show = instrument.wrap('show_training_info',
+                           methodcaller('show_training_info'))
+
+    def compute(packet: Packet) -> InfoMessage:
+        return show(read(packet.workout_type, packet.data))
+
+    return compute
+
+
+def iter_info(packets: Iterable[Packet]) -> Iterator[InfoMessage]:
+    """Рассчитать информационные сообщения по пакетам."""
+    compute = info_function()
+    for packet in packets:
+        yield compute(packet)
+
+
+def iter_results(packets: Iterable[Packet],
+                 ) -> Iterator[Tuple[Packet, InfoMessage]]:
+    """Пары (пакет, сообщение) в порядке входа; расчёт через `iter_info`."""
+    packets, pending = tee(packets)
+    return zip(packets, iter_info(pending))
+
+
+def packet_info(packet: Packet) -> InfoMessage:
+    """Сообщение по одному пакету; расчёт как в `iter_info`."""
+    return info_function()(packet)
+
+
+class PacketConsumer:
+    """Основа классов, учитывающих рассчитанные пакеты.
+
+    Наследник определяет `update(info, athlete, timestamp)`, а расчёт
+    пакетов для `update_packet` и `update_many` идёт через `iter_info`.
+    """
+
+    def update(self, info: InfoMessage, athlete: str,
+               timestamp: float) -> None:
+        """Учесть рассчитанную тренировку спортсмена."""
+        raise NotImplementedError
+
+    def update_packet(self, packet: Packet) -> InfoMessage:
+        """Рассчитать пакет и учесть результат."""
+        info = packet_info(packet)
+        self.update(info, packet.athlete, packet.timestamp)
+        return info
+
+    def update_many(self, packets: Iterable[Packet]) -> int:
+        """Учесть поток пакетов и вернуть их количество."""
+        count = 0
+        for packet, info in iter_results(packets):
+            self.update(info, packet.athlete, packet.timestamp)
+            count += 1
+        return count
+
+
+def chunked(items: Iterable[T],
+            size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[T]]:
+    """Разбить поток на списки не длиннее `size` элементов."""
+    if size < 1:
+        raise ValueError('Размер пакета должен быть положительным')
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_stream(lines: Iterable[str],
+                   fmt: str = 'csv',
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   ) -> Iterator[List[InfoMessage]]:
+    """Обработать поток пакетов, отдавая результаты порциями."""
+    return chunked(iter_info(iter_packets(lines, fmt)), chunk_size)
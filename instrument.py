@@ -0,0 +1,229 @@
+"""Замеры стадий конвейера и профилирование.
+
+Стадии конвейера (`parse`, `read_package`, `show_training_info`,
+`render`) получают функции через `wrap` один раз перед обработкой
+потока. Пока сбор метрик выключен, `wrap` возвращает исходную
+функцию, поэтому выключенные замеры ничего не стоят на каждую запись.
+"""
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterator, List,
+                    Optional, Tuple, TypeVar)
+
+if TYPE_CHECKING:
+    import cProfile
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class StageStats:
+    """Счётчики одной стадии."""
+
+    __slots__ = ('calls', 'errors', 'total_ns', 'max_ns')
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Обнулить счётчики."""
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, elapsed_ns: int, failed: bool = False) -> None:
+        """Учесть один вызов."""
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        if failed:
+            self.errors += 1
+
+    def as_dict(self) -> Dict[str, float]:
+        """Значения счётчиков в секундах и микросекундах."""
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_seconds': self.total_ns / 1e9,
+            'mean_us': self.total_ns / self.calls / 1e3 if self.calls else 0,
+            'max_us': self.max_ns / 1e3,
+        }
+
+
+class Metrics:
+    """Реестр счётчиков стадий."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> StageStats:
+        """Счётчики стадии, создаваемые по первому требованию."""
+        stats = self.stages.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.stages.setdefault(name, StageStats())
+        return stats
+
+    def reset(self) -> None:
+        """Обнулить все счётчики.
+
+        Счётчики обнуляются на месте: обёртки из `wrap` держат ссылки
+        на них и продолжают считать после сброса.
+        """
+        with self._lock:
+            for stats in self.stages.values():
+                stats.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Текущие значения счётчиков всех стадий."""
+        return {name: stats.as_dict()
+                for name, stats in sorted(self.stages.items())}
+
+    def export_json(self, path: str) -> None:
+        """Записать снимок счётчиков в JSON-файл."""
+        with open(path, 'w', encoding='utf-8') as stream:
+            json.dump(self.snapshot(), stream, indent=2)
+
+
+METRICS = Metrics()
+
+
+def enable() -> None:
+    """Включить сбор метрик для конвейеров, запущенных после вызова."""
+    METRICS.enabled = True
+
+
+def disable() -> None:
+    """Выключить сбор метрик."""
+    METRICS.enabled = False
+
+
+def wrap(stage: str, function: F) -> F:
+    """Вернуть функцию с замером времени, вызовов и ошибок стадии.
+
+    При выключенном сборе метрик возвращается сама `function`.
+    """
+    if not METRICS.enabled:
+        return function
+    stats = METRICS.get(stage)
+    clock = time.perf_counter_ns
+
+    @wraps(function)
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        start = clock()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            stats.add(clock() - start, failed=True)
+            raise
+        stats.add(clock() - start)
+        return result
+
+    return timed
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Замерить участок кода как один вызов стадии."""
+    if not METRICS.enabled:
+        yield
+        return
+    stats = METRICS.get(name)
+    start = time.perf_counter_ns()
+    try:
+        yield
+    except BaseException:
+        stats.add(time.perf_counter_ns() - start, failed=True)
+        raise
+    stats.add(time.perf_counter_ns() - start)
+
+
+@contextmanager
+def profile(path: Optional[str] = None) -> Iterator['cProfile.Profile']:
+    """Профилировать блок через cProfile и сохранить результат в `path`.
+
+    Файл читается `pstats` и `snakeviz`.
+    """
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+
+
+def print_profile(profiler: 'cProfile.Profile', limit: int = 20,
+                  sort: str = 'cumulative') -> None:
+    """Напечатать самые затратные функции профиля."""
+    import pstats
+
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats(sort).print_stats(
+        limit)
+
+
+Location = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """Профилировщик, периодически снимающий стек потока.
+
+    Работает в отдельном потоке и почти не замедляет профилируемый код;
+    результат - сколько раз каждая функция была на вершине стека.
+    """
+
+    def __init__(self, interval: float = 0.001,
+                 thread_id: Optional[int] = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                code = frame.f_code
+                self.samples[(code.co_filename, code.co_name,
+                              frame.f_lineno)] += 1
+
+    def start(self) -> 'SamplingProfiler':
+        """Начать снимать стек."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Остановить профилировщик."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'SamplingProfiler':
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def top(self, limit: int = 20) -> List[Tuple[Location, int]]:
+        """Самые частые места выполнения."""
+        return self.samples.most_common(limit)
+
+    def dump(self, path: str) -> None:
+        """Записать выборки в файл: `файл:функция:строка количество`."""
+        with open(path, 'w', encoding='utf-8') as stream:
+            for (filename, name, line), count in self.samples.most_common():
+                stream.write(f'{filename}:{name}:{line} {count}\n')
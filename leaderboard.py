@@ -0,0 +1,154 @@
+"""Таблицы лидеров по показателям тренировок.
+
+Для каждого периода, типа тренировки и показателя хранится куча из
+`k` лучших результатов, которая обновляется за O(log k) на событие.
+Запрос отдаёт отсортированную таблицу по куче, не касаясь остальных
+данных. При равных значениях выше стоит результат, пришедший раньше,
+а место делят все равные результаты.
+"""
+import heapq
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from aggregate import ALL, DAY
+from homework import InfoMessage
+from ingest import PacketConsumer
+
+METRICS: Tuple[str, ...] = ('speed', 'calories', 'distance')
+DEFAULT_K: int = 10
+DEFAULT_KEEP: int = 2
+
+
+def _month(timestamp: float) -> int:
+    moment = time.gmtime(timestamp)
+    return moment.tm_year * 12 + moment.tm_mon - 1
+
+
+PERIODS: Dict[str, Callable[[float], int]] = {
+    'day': lambda timestamp: int(timestamp // DAY),
+    'week': lambda timestamp: int((timestamp + 3 * DAY) // (7 * DAY)),
+    'month': _month,
+    'all': lambda timestamp: 0,
+}
+
+
+class Row(NamedTuple):
+    """Строка таблицы лидеров."""
+
+    rank: int
+    value: float
+    athlete: str
+    timestamp: float
+    info: InfoMessage
+
+
+class TopK:
+    """Куча `k` лучших результатов одного показателя."""
+
+    __slots__ = ('k', 'heap', 'seq')
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self.heap: List[Tuple[float, int, str, float, InfoMessage]] = []
+        self.seq = 0
+
+    def push(self, value: float, athlete: str, timestamp: float,
+             info: InfoMessage) -> bool:
+        """Учесть результат; вернуть True, если он попал в таблицу."""
+        self.seq += 1
+        item = (value, -self.seq, athlete, timestamp, info)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+            return True
+        if item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+            return True
+        return False
+
+    def rows(self, limit: Optional[int] = None) -> List[Row]:
+        """Лучшие результаты по убыванию с общими местами для равных."""
+        ordered = sorted(self.heap, reverse=True)[:limit]
+        rows: List[Row] = []
+        for position, (value, _, athlete, timestamp, info) in enumerate(
+                ordered, 1):
+            rank = rows[-1].rank if rows and rows[-1].value == value else (
+                position)
+            rows.append(Row(rank, value, athlete, timestamp, info))
+        return rows
+
+
+Board = Dict[Tuple[str, str], TopK]
+
+
+class Leaderboard(PacketConsumer):
+    """Таблицы лидеров по периодам, типам тренировок и показателям.
+
+    Хранятся `keep` последних периодов: с приходом результата нового
+    периода самый старый период удаляется. Результаты для удалённых
+    периодов не учитываются.
+    """
+
+    def __init__(self,
+                 k: int = DEFAULT_K,
+                 period: str = 'week',
+                 keep: int = DEFAULT_KEEP,
+                 metrics: Iterable[str] = METRICS,
+                 ) -> None:
+        if k < 1 or keep < 1:
+            raise ValueError('Размер таблицы и число периодов '
+                             'должны быть положительными')
+        if period not in PERIODS:
+            raise ValueError(f'{period} - неизвестный период;'
+                             f' используйте: {", ".join(PERIODS)}')
+        self.k = k
+        self.keep = keep
+        self.period_of = PERIODS[period]
+        self.metrics = tuple(metrics)
+        self.boards: Dict[int, Board] = {}
+
+    @property
+    def current(self) -> Optional[int]:
+        """Последний период, в котором есть результаты."""
+        return max(self.boards) if self.boards else None
+
+    def _board(self, period: int) -> Optional[Board]:
+        """Таблицы периода; новый период вытесняет самый старый."""
+        board = self.boards.get(period)
+        if board is not None:
+            return board
+        if len(self.boards) >= self.keep and period < min(self.boards):
+            return None
+        board = self.boards[period] = {}
+        while len(self.boards) > self.keep:
+            del self.boards[min(self.boards)]
+        return board
+
+    def update(self, info: InfoMessage, athlete: str,
+               timestamp: float) -> None:
+        """Учесть рассчитанную тренировку спортсмена."""
+        board = self._board(self.period_of(timestamp))
+        if board is None:
+            return
+        for metric in self.metrics:
+            value = getattr(info, metric)
+            for training_type in (info.training_type, ALL):
+                top = board.get((training_type, metric))
+                if top is None:
+                    top = board[training_type, metric] = TopK(self.k)
+                top.push(value, athlete, timestamp, info)
+
+    def top(self, metric: str,
+            training_type: str = ALL,
+            at: Optional[float] = None,
+            limit: Optional[int] = None,
+            ) -> List[Row]:
+        """Таблица лидеров по показателю.
+
+        Период берётся по моменту `at`, по умолчанию - последний.
+        """
+        if metric not in self.metrics:
+            raise ValueError(f'{metric} - неизвестный показатель;'
+                             f' используйте: {", ".join(self.metrics)}')
+        period = self.current if at is None else self.period_of(at)
+        top = self.boards.get(period, {}).get((training_type, metric))
+        return [] if top is None else top.rows(limit)
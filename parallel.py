@@ -0,0 +1,141 @@
+"""Параллельная обработка больших файлов пакетов в пуле процессов."""
+import io
+import os
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Executor, Future,
+                                ProcessPoolExecutor, wait)
+from typing import (Any, Callable, Deque, Iterable, Iterator, List, Optional,
+                    Set, Tuple)
+
+from homework import InfoMessage
+from ingest import (DEFAULT_CHUNK_SIZE, Packet, chunked, iter_info,
+                    iter_packets)
+
+DEFAULT_SHARD_BYTES: int = 4 * 1024 * 1024
+
+Shard = Tuple[int, int]
+
+
+def byte_shards(path: str,
+                shard_bytes: int = DEFAULT_SHARD_BYTES) -> List[Shard]:
+    """Разбить файл на диапазоны байт, выровненные по границам строк.
+
+    Каждый диапазон `[start, end)` начинается с начала строки и
+    содержит только целые строки.
+    """
+    if shard_bytes < 1:
+        raise ValueError('Размер шарда должен быть положительным')
+    size = os.path.getsize(path)
+    shards: List[Shard] = []
+    start = 0
+    with open(path, 'rb') as stream:
+        while start < size:
+            end = start + shard_bytes
+            if end < size:
+                stream.seek(end - 1)
+                stream.readline()
+                end = stream.tell()
+            end = min(end, size)
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def read_shard(path: str, shard: Shard) -> List[str]:
+    """Прочитать строки диапазона байт файла.
+
+    Строки делятся так же, как при чтении файла в текстовом режиме,
+    поэтому шарды разбираются одинаково с последовательной обработкой.
+    """
+    start, end = shard
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        data = stream.read(end - start)
+    return list(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8'))
+
+
+def process_shard(path: str, fmt: str, shard: Shard) -> List[InfoMessage]:
+    """Рассчитать сообщения для одного шарда файла."""
+    return list(iter_info(iter_packets(read_shard(path, shard), fmt)))
+
+
+def process_chunk(packets: List[Packet]) -> List[InfoMessage]:
+    """Рассчитать сообщения для порции пакетов."""
+    return list(iter_info(packets))
+
+
+def _run(executor: Executor,
+         function: Callable[..., List[InfoMessage]],
+         tasks: Iterable[Tuple[Any, ...]],
+         window: int,
+         ordered: bool,
+         ) -> Iterator[List[InfoMessage]]:
+    """Выполнить задачи, держа в работе не больше `window` штук.
+
+    При `ordered=True` результаты отдаются в порядке задач, иначе
+    по мере готовности.
+    """
+    tasks = iter(tasks)
+    pending: Deque[Future] = deque()
+    running: Set[Future] = set()
+    for arguments in tasks:
+        future = executor.submit(function, *arguments)
+        pending.append(future)
+        running.add(future)
+        if len(running) < window:
+            continue
+        if ordered:
+            first = pending.popleft()
+            running.discard(first)
+            yield first.result()
+        else:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.discard(future)
+                yield future.result()
+    if ordered:
+        for future in pending:
+            yield future.result()
+    else:
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def process_file(path: str,
+                 fmt: str = 'csv',
+                 workers: Optional[int] = None,
+                 shard_bytes: int = DEFAULT_SHARD_BYTES,
+                 ordered: bool = True,
+                 ) -> Iterator[InfoMessage]:
+    """Обработать файл пакетов, разбив его на шарды по байтам.
+
+    При `ordered=True` сообщения идут в том же порядке, что и при
+    последовательной обработке через `read_package`.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = byte_shards(path, shard_bytes)
+    with ProcessPoolExecutor(workers) as executor:
+        tasks = ((path, fmt, shard) for shard in shards)
+        for messages in _run(executor, process_shard, tasks,
+                             2 * workers, ordered):
+            yield from messages
+
+
+def process_packets(packets: Iterable[Packet],
+                    workers: Optional[int] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    ordered: bool = True,
+                    ) -> Iterator[InfoMessage]:
+    """Обработать поток пакетов порциями по `chunk_size` записей.
+
+    Поток читается лениво: в работе одновременно не больше двух
+    порций на процесс.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        tasks = ((chunk,) for chunk in chunked(packets, chunk_size))
+        for messages in _run(executor, process_chunk, tasks,
+                             2 * workers, ordered):
+            yield from messages
@@ -0,0 +1,248 @@
+"""Реестр типов тренировок и декларативные формулы расчёта.
+
+Формулы задаются строками-выражениями над полями конструктора,
+атрибутами класса (коэффициентами) и уже рассчитанными показателями
+`distance` и `speed`. Из одного выражения строятся метод класса
+для расчёта одной тренировки и пакетное ядро для столбцов данных;
+порядок операций в них одинаков, поэтому результаты совпадают бит в бит.
+"""
+import ast
+import inspect
+from dataclasses import dataclass, field
+from typing import (Any, Callable, Dict, List, Mapping, Optional, Sequence,
+                    Tuple, Type)
+
+Column = Sequence[float]
+Kernel = Callable[..., Tuple[List[float], List[float], List[float]]]
+
+METRICS: Tuple[str, ...] = ('distance', 'speed', 'calories')
+METHODS: Dict[str, str] = {
+    'distance': 'get_distance',
+    'speed': 'get_mean_speed',
+    'calories': 'get_spent_calories',
+}
+DEFAULT_FORMULAS: Dict[str, str] = {
+    'distance': 'action * LEN_STEP / M_IN_KM',
+    'speed': 'distance / duration',
+}
+
+
+def _names(expression: str) -> List[str]:
+    """Имена, используемые в выражении, в порядке появления."""
+    tree = ast.parse(expression, mode='eval')
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in names:
+            names.append(node.id)
+        elif not isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp,
+                                   ast.operator, ast.unaryop, ast.Constant,
+                                   ast.Name, ast.Load)):
+            raise ValueError(f'Недопустимая конструкция в формуле '
+                             f'{expression!r}: {type(node).__name__}')
+    return names
+
+
+def _check_names(metric: str, expression: str, fields: Sequence[str],
+                 training_class: type) -> None:
+    """Проверить, что все имена формулы известны."""
+    allowed = set(fields) | set(METRICS[:METRICS.index(metric)])
+    for name in _names(expression):
+        if name not in allowed and not hasattr(training_class, name):
+            raise ValueError(f'Неизвестное имя {name} в формуле {metric} '
+                             f'для {training_class.__name__}')
+
+
+class _SelfAccess(ast.NodeTransformer):
+    """Заменить имена формулы обращениями к экземпляру."""
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        self.fields = set(fields)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        self_name = ast.Name('self', ast.Load())
+        if node.id in METHODS and node.id not in self.fields:
+            method = ast.Attribute(self_name, METHODS[node.id], ast.Load())
+            return ast.Call(method, [], [])
+        return ast.Attribute(self_name, node.id, ast.Load())
+
+
+def compile_method(metric: str, expression: str,
+                   fields: Sequence[str]) -> Callable[[Any], float]:
+    """Собрать метод класса, вычисляющий показатель по формуле."""
+    tree = _SelfAccess(fields).visit(ast.parse(expression, mode='eval'))
+    source = (f'def {METHODS[metric]}(self):\n'
+              f'    return {ast.unparse(ast.fix_missing_locations(tree))}\n')
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f'<formula {metric}>', 'exec'), namespace)
+    return namespace[METHODS[metric]]
+
+
+def compile_kernel(formulas: Mapping[str, str],
+                   fields: Sequence[str],
+                   ) -> Tuple[Kernel, Tuple[str, ...]]:
+    """Собрать пакетное ядро и вернуть его вместе с нужными столбцами.
+
+    Ядро принимает класс тренировки (для чтения коэффициентов в момент
+    вызова) и столбцы полей; каждая формула считается одним списковым
+    включением по этим столбцам.
+    """
+    used: List[str] = []
+    constants: List[str] = []
+    lines: List[str] = []
+    for metric in METRICS:
+        expression = formulas[metric]
+        loop_names: List[str] = []
+        sources: List[str] = []
+        for name in _names(expression):
+            if name in fields:
+                if name not in used:
+                    used.append(name)
+                sources.append(f'_c_{name}')
+            elif name in METRICS:
+                sources.append(f'_m_{name}')
+            else:
+                if name not in constants:
+                    constants.append(name)
+                continue
+            loop_names.append(name)
+        if not loop_names:
+            raise ValueError(f'Формула {metric} не зависит от данных')
+        if len(loop_names) == 1:
+            loop = f'for {loop_names[0]} in {sources[0]}'
+        else:
+            loop = (f'for {", ".join(loop_names)} '
+                    f'in zip({", ".join(sources)})')
+        lines.append(f'    _m_{metric} = [{expression} {loop}]')
+    arguments = ', '.join(f'_c_{name}' for name in used)
+    source = '\n'.join(
+        [f'def kernel(cls, {arguments}):']
+        + [f'    {name} = cls.{name}' for name in constants]
+        + lines
+        + ['    return _m_distance, _m_speed, _m_calories\n']
+    )
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, '<formula kernel>', 'exec'), namespace)
+    return namespace['kernel'], tuple(used)
+
+
+@dataclass
+class WorkoutType:
+    """Зарегистрированный тип тренировки."""
+
+    code: str
+    training_class: Type[Any]
+    fields: Tuple[str, ...]
+    formulas: Dict[str, str]
+    kernel: Kernel = field(repr=False)
+    kernel_fields: Tuple[str, ...]
+
+    def compute(self, columns: Mapping[str, Column],
+                ) -> Tuple[List[float], List[float], List[float]]:
+        """Рассчитать дистанцию, скорость и калории по столбцам."""
+        return self.kernel(self.training_class,
+                           *(columns[name] for name in self.kernel_fields))
+
+
+WORKOUT_TYPES: Dict[str, WorkoutType] = {}
+
+
+def register_workout(code: str,
+                     training_class: Type[Any],
+                     fields: Sequence[str],
+                     calories: str,
+                     distance: Optional[str] = None,
+                     speed: Optional[str] = None,
+                     ) -> WorkoutType:
+    """Зарегистрировать тип тренировки и его формулы.
+
+    Формулы должны повторять методы класса: по ним строится пакетное
+    ядро. Дистанция и скорость по умолчанию берутся у ближайшего
+    зарегистрированного предка класса, а без него - как в `Training`.
+    """
+    if code in WORKOUT_TYPES:
+        raise ValueError(f'Тип тренировки {code} уже зарегистрирован')
+    inherited = _base_formulas(training_class)
+    formulas = {
+        'distance': distance or inherited['distance'],
+        'speed': speed or inherited['speed'],
+        'calories': calories,
+    }
+    for metric, expression in formulas.items():
+        _check_names(metric, expression, fields, training_class)
+    kernel, kernel_fields = compile_kernel(formulas, fields)
+    workout = WorkoutType(code, training_class, tuple(fields), formulas,
+                          kernel, kernel_fields)
+    WORKOUT_TYPES[code] = workout
+    return workout
+
+
+def _base_formulas(training_class: Type[Any]) -> Mapping[str, str]:
+    """Формулы ближайшего зарегистрированного предка класса."""
+    for base in training_class.__mro__[1:]:
+        for workout in WORKOUT_TYPES.values():
+            if workout.training_class is base:
+                return workout.formulas
+    return DEFAULT_FORMULAS
+
+
+def unregister_workout(code: str) -> None:
+    """Удалить тип тренировки из реестра."""
+    del WORKOUT_TYPES[code]
+
+
+def get_workout(code: str) -> WorkoutType:
+    """Найти тип тренировки по коду."""
+    if code not in WORKOUT_TYPES:
+        code_list = ', '.join(WORKOUT_TYPES)
+        raise ValueError(f'{code} - неизвестный тип тренировки;'
+                         f' используйте: {code_list}')
+    return WORKOUT_TYPES[code]
+
+
+def _make_init(base: Type[Any], fields: Sequence[str]) -> Callable:
+    """Собрать конструктор, передающий поля базовому классу.
+
+    Поля базового класса берутся из сигнатуры его конструктора.
+    """
+    base_fields = list(inspect.signature(base.__init__).parameters)[1:]
+    missing = [name for name in base_fields if name not in fields]
+    if missing:
+        raise ValueError(f'Для {base.__name__} нужны поля: '
+                         f'{", ".join(missing)}')
+    own = [name for name in fields if name not in base_fields]
+    arguments = ', '.join(fields)
+    body = [f'    base.__init__(self, {", ".join(base_fields)})']
+    body += [f'    self.{name} = {name}' for name in own]
+    source = f'def __init__(self, {arguments}):\n' + '\n'.join(body) + '\n'
+    namespace: Dict[str, Any] = {'base': base}
+    exec(compile(source, '<workout init>', 'exec'), namespace)
+    return namespace['__init__']
+
+
+def define_workout(code: str,
+                   name: str,
+                   base: Type[Any],
+                   calories: str,
+                   fields: Sequence[str] = ('action', 'duration', 'weight'),
+                   coefficients: Optional[Mapping[str, float]] = None,
+                   distance: Optional[str] = None,
+                   speed: Optional[str] = None,
+                   doc: Optional[str] = None,
+                   ) -> Type[Any]:
+    """Создать класс тренировки по формулам и зарегистрировать его.
+
+    Методы `get_distance`, `get_mean_speed` и `get_spent_calories`
+    собираются из тех же выражений, что и пакетное ядро.
+    """
+    namespace: Dict[str, Any] = dict(coefficients or {})
+    namespace['__doc__'] = doc or f'Тренировка: {name}.'
+    namespace['__init__'] = _make_init(base, fields)
+    formulas = {'distance': distance, 'speed': speed, 'calories': calories}
+    for metric, expression in formulas.items():
+        if expression is not None:
+            namespace[METHODS[metric]] = compile_method(metric, expression,
+                                                        fields)
+    training_class = type(name, (base,), namespace)
+    register_workout(code, training_class, fields, calories,
+                     distance, speed)
+    return training_class
@@ -0,0 +1,189 @@
+"""Массовый вывод информационных сообщений в текст, CSV и JSON-lines."""
+import csv
+import io
+import json
+from math import isfinite
+from operator import attrgetter
+from string import Formatter
+from typing import (Callable, Dict, Iterable, List, Sequence, TextIO,
+                    Tuple)
+
+import instrument
+from homework import InfoMessage
+
+FIELDS = ('training_type', 'duration', 'distance', 'speed', 'calories')
+DEFAULT_FLUSH_EVERY: int = 4096
+
+Renderer = Callable[[Sequence[InfoMessage]], str]
+
+
+def percent_template(template: str) -> Tuple[str, Tuple[str, ...]]:
+    """Перевести шаблон `str.format` с именованными полями в %-шаблон.
+
+    Поля без спецификации выводятся как `%s`, со спецификацией вида
+    `.3f` - как `%.3f`. Возвращает шаблон и имена полей в порядке
+    подстановки: шаблон разбирается один раз, после чего строки
+    собираются оператором `%` по кортежу значений.
+    """
+    parts: List[str] = []
+    names: List[str] = []
+    for literal, name, spec, conversion in Formatter().parse(template):
+        parts.append(literal.replace('%', '%%'))
+        if name is None:
+            continue
+        if name not in FIELDS or conversion:
+            raise ValueError(f'Неподдерживаемое поле шаблона: {name}')
+        parts.append(f'%{spec}' if spec else '%s')
+        names.append(name)
+    return ''.join(parts), tuple(names)
+
+
+def values_getter(names: Sequence[str]) -> Callable[[InfoMessage], tuple]:
+    """Функция, возвращающая кортеж значений полей сообщения."""
+    getter = attrgetter(*names)
+    if len(names) == 1:
+        return lambda message: (getter(message),)
+    return getter
+
+
+TEXT_TEMPLATE, TEXT_FIELDS = percent_template(InfoMessage.TEXT_MES)
+CSV_HEADER: str = ','.join(FIELDS) + '\n'
+
+_text_values = values_getter(TEXT_FIELDS)
+
+
+def render_text(messages: Sequence[InfoMessage]) -> str:
+    """Строки `InfoMessage.get_message` для пакета сообщений."""
+    template, values = TEXT_TEMPLATE + '\n', _text_values
+    return ''.join([template % values(m) for m in messages])
+
+
+_csv_names: Dict[str, str] = {}
+
+
+def _csv_name(training_type: str) -> str:
+    """Тип тренировки, экранированный модулем `csv`."""
+    name = _csv_names.get(training_type)
+    if name is None:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='').writerow([training_type])
+        name = _csv_names[training_type] = buffer.getvalue()
+    return name
+
+
+def render_csv(messages: Sequence[InfoMessage]) -> str:
+    """Строки CSV с полной точностью чисел."""
+    return ''.join(['%s,%r,%r,%r,%r\n'
+                    % (_csv_name(m.training_type), m.duration, m.distance,
+                       m.speed, m.calories) for m in messages])
+
+
+_json_names: Dict[str, str] = {}
+
+
+def render_jsonl(messages: Sequence[InfoMessage]) -> str:
+    """Объекты JSON по одному на строку с полной точностью чисел.
+
+    NaN и бесконечности в JSON недопустимы и вызывают ValueError.
+    """
+    lines = []
+    for message in messages:
+        name = _json_names.get(message.training_type)
+        if name is None:
+            name = _json_names[message.training_type] = json.dumps(
+                message.training_type, ensure_ascii=False)
+        if not (isfinite(message.duration) and isfinite(message.distance)
+                and isfinite(message.speed)
+                and isfinite(message.calories)):
+            raise ValueError(f'Нечисловое значение в сообщении {message} '
+                             f'недопустимо в JSON')
+        lines.append('{"training_type": %s, "duration": %r, '
+                     '"distance": %r, "speed": %r, "calories": %r}\n'
+                     % (name, message.duration, message.distance,
+                        message.speed, message.calories))
+    return ''.join(lines)
+
+
+RENDERERS: Dict[str, Renderer] = {
+    'text': render_text,
+    'csv': render_csv,
+    'jsonl': render_jsonl,
+}
+HEADERS: Dict[str, str] = {'csv': CSV_HEADER}
+
+
+def get_renderer(fmt: str) -> Renderer:
+    """Вернуть функцию вывода для формата."""
+    if fmt not in RENDERERS:
+        raise ValueError(f'{fmt} - неизвестный формат вывода;'
+                         f' используйте: {", ".join(RENDERERS)}')
+    return RENDERERS[fmt]
+
+
+class BufferedSink:
+    """Приёмник сообщений, выводящий их пакетами.
+
+    Сообщения копятся в буфере и выводятся одной операцией записи
+    на каждые `flush_every` сообщений, а также при `flush` и `close`.
+    """
+
+    def __init__(self,
+                 stream: TextIO,
+                 fmt: str = 'text',
+                 flush_every: int = DEFAULT_FLUSH_EVERY,
+                 header: bool = True,
+                 ) -> None:
+        if flush_every < 1:
+            raise ValueError('Размер пакета должен быть положительным')
+        self.stream = stream
+        self.render = instrument.wrap('render', get_renderer(fmt))
+        self.flush_every = flush_every
+        self.count = 0
+        self._buffer: List[InfoMessage] = []
+        if header and fmt in HEADERS:
+            stream.write(HEADERS[fmt])
+
+    def __enter__(self) -> 'BufferedSink':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def write(self, message: InfoMessage) -> None:
+        """Добавить сообщение в буфер."""
+        self._buffer.append(message)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def write_many(self, messages: Iterable[InfoMessage]) -> None:
+        """Добавить несколько сообщений."""
+        buffer = self._buffer
+        for message in messages:
+            buffer.append(message)
+            if len(buffer) >= self.flush_every:
+                self.flush()
+                buffer = self._buffer
+
+    def flush(self) -> None:
+        """Вывести накопленные сообщения одной записью."""
+        if self._buffer:
+            self.stream.write(self.render(self._buffer))
+            self.count += len(self._buffer)
+            self._buffer = []
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Вывести остаток буфера."""
+        self.flush()
+
+
+def write_report(messages: Iterable[InfoMessage],
+                 stream: TextIO,
+                 fmt: str = 'text',
+                 flush_every: int = DEFAULT_FLUSH_EVERY,
+                 header: bool = True,
+                 ) -> int:
+    """Вывести все сообщения и вернуть их количество."""
+    with BufferedSink(stream, fmt, flush_every, header) as sink:
+        sink.write_many(messages)
+    return sink.count
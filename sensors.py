@@ -0,0 +1,151 @@
+"""Свёртка посекундных отсчётов датчиков в пакеты тренировок.
+
+Новые блоки датчиков присылают отсчёты: спортсмен, время, шаги (для
+плавания - гребки) с прошлого отсчёта и завершённые дорожки бассейна.
+Отсчёты одного спортсмена собираются в сессию, пока между ними нет
+паузы дольше `gap` секунд; закрытая сессия превращается в `Packet`
+с полями, которые ожидает `read_package`. Память зависит только от
+числа спортсменов с открытой сессией, а не от длины потока.
+"""
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from ingest import Packet
+from registry import get_workout
+
+DEFAULT_GAP: float = 5 * 60
+DEFAULT_INTERVAL: float = 1.0
+SEC_IN_HOUR: int = 60 * 60
+
+
+class Sample(NamedTuple):
+    """Отсчёт датчика за один интервал."""
+
+    athlete: str
+    timestamp: float
+    steps: int = 0
+    laps: int = 0
+
+
+class Profile(NamedTuple):
+    """Постоянные данные спортсмена для расчёта тренировки."""
+
+    workout_type: str
+    weight: float
+    height: float = 0.0
+    length_pool: float = 0.0
+
+
+class _Session:
+    """Накопленные данные открытой сессии."""
+
+    __slots__ = ('start', 'last', 'steps', 'laps')
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.last = start
+        self.steps = 0
+        self.laps = 0
+
+
+def parse_sample_line(line: str) -> Optional[Sample]:
+    """Разобрать строку вида `athlete,1700000000,3,0`."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    athlete, timestamp, steps, laps = line.split(',')
+    return Sample(athlete.strip(), float(timestamp), int(steps), int(laps))
+
+
+def iter_samples(lines: Iterable[str]) -> Iterator[Sample]:
+    """Лениво разобрать отсчёты из строк файла или потока."""
+    for line in lines:
+        sample = parse_sample_line(line)
+        if sample is not None:
+            yield sample
+
+
+class SessionReducer:
+    """Потоковая свёртка отсчётов в пакеты по сессиям спортсменов.
+
+    Длительность сессии - время от первого до последнего отсчёта плюс
+    `interval`, который покрывает последний отсчёт.
+    """
+
+    def __init__(self,
+                 profiles: Dict[str, Profile],
+                 gap: float = DEFAULT_GAP,
+                 interval: float = DEFAULT_INTERVAL,
+                 ) -> None:
+        if gap <= 0 or interval <= 0:
+            raise ValueError('Пауза и интервал должны быть положительными')
+        self.profiles = profiles
+        self.gap = gap
+        self.interval = interval
+        self.sessions: Dict[str, _Session] = {}
+        self.clock = float('-inf')
+
+    def add(self, sample: Sample) -> Optional[Packet]:
+        """Учесть отсчёт; вернуть пакет, если он закрыл прошлую сессию."""
+        athlete, timestamp = sample.athlete, sample.timestamp
+        if timestamp > self.clock:
+            self.clock = timestamp
+        closed = None
+        session = self.sessions.get(athlete)
+        if session is not None and timestamp - session.last > self.gap:
+            closed = self.packet(athlete, session)
+            session = None
+        if session is None:
+            if athlete not in self.profiles:
+                raise ValueError(f'{athlete} - нет профиля спортсмена')
+            session = self.sessions[athlete] = _Session(timestamp)
+        elif timestamp > session.last:
+            session.last = timestamp
+        elif timestamp < session.start:
+            session.start = timestamp
+        session.steps += sample.steps
+        session.laps += sample.laps
+        return closed
+
+    def packet(self, athlete: str, session: _Session) -> Packet:
+        """Пакет тренировки по данным сессии."""
+        profile = self.profiles[athlete]
+        values = {
+            'action': session.steps,
+            'duration': ((session.last - session.start + self.interval)
+                         / SEC_IN_HOUR),
+            'weight': profile.weight,
+            'height': profile.height,
+            'length_pool': profile.length_pool,
+            'count_pool': session.laps,
+        }
+        fields = get_workout(profile.workout_type).fields
+        return Packet(profile.workout_type, [values[f] for f in fields],
+                      athlete, session.start)
+
+    def expire(self, now: Optional[float] = None) -> List[Packet]:
+        """Закрыть сессии без отсчётов дольше `gap`; без `now` - все."""
+        sessions = self.sessions
+        if now is None:
+            closed = list(sessions)
+        else:
+            border = now - self.gap
+            closed = [athlete for athlete, session in sessions.items()
+                      if session.last < border]
+        return [self.packet(athlete, sessions.pop(athlete))
+                for athlete in closed]
+
+    def reduce(self, samples: Iterable[Sample]) -> Iterator[Packet]:
+        """Свернуть поток отсчётов в пакеты, закрывая сессии по ходу.
+
+        Устаревшие сессии ищутся не чаще раза за `gap` секунд времени
+        потока; в конце потока закрываются все оставшиеся.
+        """
+        next_expire = float('-inf')
+        for sample in samples:
+            packet = self.add(sample)
+            if packet is not None:
+                yield packet
+            if self.clock >= next_expire:
+                yield from self.expire(self.clock)
+                next_expire = self.clock + self.gap
+        yield from self.expire()
@@ -0,0 +1,207 @@
+"""Сервер asyncio для приёма пакетов от устройств с микропакетами.
+
+Протокол построчный: клиент отправляет пакеты в формате CSV или
+JSON-lines (по одному в строке), сервер отвечает на каждый пакет
+строкой JSON в том же порядке - результатом расчёта или
+`{"error": "..."}`.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from homework import InfoMessage, read_package
+from ingest import Packet, get_parser
+from report import render_jsonl
+
+DEFAULT_MAX_BATCH: int = 256
+DEFAULT_MAX_DELAY: float = 0.005
+LATENCY_WINDOW: int = 10_000
+
+
+class LatencyStats:
+    """Задержки обработки и счётчики пропускной способности.
+
+    Перцентили считаются по последним `window` задержкам.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.started = time.monotonic()
+        self.processed = 0
+        self.errors = 0
+        self.batches = 0
+
+    def record(self, latency: float) -> None:
+        """Учесть задержку одного пакета."""
+        self.latencies.append(latency)
+        self.processed += 1
+
+    def percentile(self, percent: float) -> float:
+        """Перцентиль задержки в секундах."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Текущие значения метрик."""
+        elapsed = time.monotonic() - self.started
+        return {
+            'processed': self.processed,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch': self.processed / self.batches if self.batches else 0,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'throughput': self.processed / elapsed if elapsed else 0.0,
+        }
+
+
+class MicroBatcher:
+    """Накопитель пакетов, считающий их пачками по размеру или сроку.
+
+    Пачка обрабатывается, когда в ней набралось `max_batch` пакетов
+    или с момента прихода первого пакета прошло `max_delay` секунд.
+    """
+
+    def __init__(self,
+                 max_batch: int = DEFAULT_MAX_BATCH,
+                 max_delay: float = DEFAULT_MAX_DELAY,
+                 stats: Optional[LatencyStats] = None,
+                 ) -> None:
+        if max_batch < 1:
+            raise ValueError('Размер пачки должен быть положительным')
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = stats or LatencyStats()
+        self._items: List[Tuple[Packet, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, packet: Packet) -> asyncio.Future:
+        """Поставить пакет в пачку и вернуть будущий результат."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((packet, future, time.monotonic()))
+        if len(self._items) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+        return future
+
+    def flush(self) -> None:
+        """Рассчитать все накопленные пакеты.
+
+        Любая ошибка расчёта передаётся в будущий результат своего
+        пакета, чтобы ни один клиент не остался без ответа.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._items = self._items, []
+        if not items:
+            return
+        self.stats.batches += 1
+        for packet, future, received in items:
+            try:
+                info = read_package(packet.workout_type,
+                                    packet.data).show_training_info()
+            except Exception as error:
+                self.stats.errors += 1
+                if not future.done():
+                    future.set_exception(error)
+                continue
+            if not future.done():
+                future.set_result(info)
+            self.stats.record(time.monotonic() - received)
+
+
+def _error_line(error: BaseException) -> bytes:
+    """Строка ответа с описанием ошибки."""
+    return (json.dumps({'error': str(error)}, ensure_ascii=False)
+            + '\n').encode('utf-8')
+
+
+class PacketServer:
+    """TCP-сервер, принимающий пакеты и возвращающий сообщения."""
+
+    def __init__(self,
+                 fmt: str = 'csv',
+                 max_batch: int = DEFAULT_MAX_BATCH,
+                 max_delay: float = DEFAULT_MAX_DELAY,
+                 ) -> None:
+        self.parse = get_parser(fmt)
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(max_batch, max_delay, self.stats)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = '127.0.0.1',
+                    port: int = 0) -> Tuple[str, int]:
+        """Начать приём соединений и вернуть адрес сервера."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        """Остановить сервер и обработать оставшиеся пакеты."""
+        self.batcher.flush()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _reply(self, writer: asyncio.StreamWriter,
+                     replies: 'asyncio.Queue[Any]') -> None:
+        """Отправлять ответы клиенту в порядке пакетов."""
+        while True:
+            reply = await replies.get()
+            if reply is None:
+                break
+            if isinstance(reply, BaseException):
+                writer.write(_error_line(reply))
+                continue
+            try:
+                info: InfoMessage = await reply
+                line = render_jsonl([info]).encode('utf-8')
+            except Exception as error:
+                line = _error_line(error)
+            writer.write(line)
+            if replies.empty():
+                await writer.drain()
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        """Обслужить одно соединение."""
+        replies: 'asyncio.Queue[Any]' = asyncio.Queue()
+        sender = asyncio.create_task(self._reply(writer, replies))
+        try:
+            async for raw in reader:
+                try:
+                    packet = self.parse(raw.decode('utf-8'))
+                except Exception as error:
+                    self.stats.errors += 1
+                    replies.put_nowait(error)
+                    continue
+                if packet is not None:
+                    replies.put_nowait(self.batcher.submit(packet))
+        finally:
+            replies.put_nowait(None)
+            await sender
+            writer.close()
+            await writer.wait_closed()
+
+
+async def serve(host: str = '127.0.0.1',
+                port: int = 8765,
+                fmt: str = 'csv',
+                max_batch: int = DEFAULT_MAX_BATCH,
+                max_delay: float = DEFAULT_MAX_DELAY,
+                ) -> None:
+    """Запустить сервер и обслуживать клиентов до остановки."""
+    server = PacketServer(fmt, max_batch, max_delay)
+    await server.start(host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
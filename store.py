@@ -0,0 +1,194 @@
+"""Хранилище тренировок в SQLite с пакетной записью и агрегатами.
+
+Пакеты записываются вместе с рассчитанными полями `InfoMessage`
+порциями в одной транзакции. Индексы по спортсмену, типу тренировки
+и времени позволяют считать итоги за период и по типам в самом SQL,
+не перечитывая историю в Python.
+"""
+import json
+import sqlite3
+from itertools import islice
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Sequence,
+                    Tuple)
+
+from homework import InfoMessage
+from ingest import Packet, iter_results
+
+DEFAULT_BATCH_SIZE: int = 10_000
+PERIODS: Dict[str, str] = {
+    'day': '%Y-%m-%d',
+    'week': '%Y-%W',
+    'month': '%Y-%m',
+    'year': '%Y',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY,
+    athlete TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    code TEXT NOT NULL,
+    data TEXT NOT NULL,
+    training_type TEXT NOT NULL,
+    duration REAL NOT NULL,
+    distance REAL NOT NULL,
+    speed REAL NOT NULL,
+    calories REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workouts_athlete
+    ON workouts (athlete, timestamp);
+CREATE INDEX IF NOT EXISTS workouts_type
+    ON workouts (training_type, timestamp);
+CREATE INDEX IF NOT EXISTS workouts_timestamp
+    ON workouts (timestamp);
+"""
+INSERT = ('INSERT INTO workouts (athlete, timestamp, code, data, '
+          'training_type, duration, distance, speed, calories) '
+          'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)')
+TOTALS = """
+    COUNT(*) AS count,
+    COALESCE(SUM(duration), 0.0) AS duration,
+    COALESCE(SUM(distance), 0.0) AS distance,
+    COALESCE(SUM(calories), 0.0) AS calories,
+    COALESCE(AVG(duration), 0.0) AS mean_duration,
+    COALESCE(AVG(distance), 0.0) AS mean_distance,
+    COALESCE(AVG(calories), 0.0) AS mean_calories,
+    COALESCE(SUM(distance) / NULLIF(SUM(duration), 0), 0.0) AS mean_speed
+"""
+
+Row = Tuple[Packet, InfoMessage]
+
+
+def _row(packet: Packet, info: InfoMessage) -> Tuple[Any, ...]:
+    """Строка таблицы по пакету и результату расчёта."""
+    return (packet.athlete, packet.timestamp, packet.workout_type,
+            json.dumps(packet.data), info.training_type, info.duration,
+            info.distance, info.speed, info.calories)
+
+
+def _where(athlete: Optional[str],
+           training_type: Optional[str],
+           start: Optional[float],
+           end: Optional[float],
+           ) -> Tuple[str, List[Any]]:
+    """Условие WHERE и его параметры; `end` не входит в период."""
+    conditions, params = [], []
+    for condition, value in (('athlete = ?', athlete),
+                             ('training_type = ?', training_type),
+                             ('timestamp >= ?', start),
+                             ('timestamp < ?', end)):
+        if value is not None:
+            conditions.append(condition)
+            params.append(value)
+    if not conditions:
+        return '', params
+    return 'WHERE ' + ' AND '.join(conditions), params
+
+
+class WorkoutStore:
+    """Тренировки спортсменов в базе SQLite."""
+
+    def __init__(self, path: str = ':memory:') -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self.connection.execute('PRAGMA journal_mode = WAL')
+            self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Закрыть соединение с базой."""
+        self.connection.close()
+
+    def __enter__(self) -> 'WorkoutStore':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def add_many(self, rows: Iterable[Row],
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Записать пары (пакет, сообщение) транзакциями по `batch_size`.
+
+        Возвращает количество записанных строк.
+        """
+        if batch_size < 1:
+            raise ValueError('Размер пакета должен быть положительным')
+        iterator = iter(rows)
+        count = 0
+        while True:
+            chunk = [_row(packet, info)
+                     for packet, info in islice(iterator, batch_size)]
+            if not chunk:
+                return count
+            with self.connection:
+                self.connection.executemany(INSERT, chunk)
+            count += len(chunk)
+
+    def add_packets(self, packets: Iterable[Packet],
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Рассчитать пакеты через `iter_info` и записать их."""
+        return self.add_many(iter_results(packets), batch_size)
+
+    def __len__(self) -> int:
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM workouts').fetchone()[0]
+
+    def totals(self,
+               athlete: Optional[str] = None,
+               training_type: Optional[str] = None,
+               start: Optional[float] = None,
+               end: Optional[float] = None,
+               ) -> Dict[str, float]:
+        """Итоги и средние по отобранным тренировкам."""
+        where, params = _where(athlete, training_type, start, end)
+        row = self.connection.execute(
+            f'SELECT {TOTALS} FROM workouts {where}', params).fetchone()
+        return dict(row)
+
+    def _totals_by(self, group: str,
+                   params: Sequence[Any],
+                   where: str) -> List[Dict[str, Any]]:
+        """Итоги по группам выражения `group` в порядке групп."""
+        rows = self.connection.execute(
+            f'SELECT {group} AS key, {TOTALS} FROM workouts {where} '
+            'GROUP BY key ORDER BY key', params)
+        return [dict(row) for row in rows]
+
+    def totals_by_period(self,
+                         period: str = 'day',
+                         athlete: Optional[str] = None,
+                         training_type: Optional[str] = None,
+                         start: Optional[float] = None,
+                         end: Optional[float] = None,
+                         ) -> List[Dict[str, Any]]:
+        """Итоги за каждый день, неделю, месяц или год (UTC)."""
+        if period not in PERIODS:
+            raise ValueError(f'{period} - неизвестный период;'
+                             f' используйте: {", ".join(PERIODS)}')
+        where, params = _where(athlete, training_type, start, end)
+        group = f"strftime('{PERIODS[period]}', timestamp, 'unixepoch')"
+        return self._totals_by(group, params, where)
+
+    def totals_by_type(self,
+                       athlete: Optional[str] = None,
+                       start: Optional[float] = None,
+                       end: Optional[float] = None,
+                       ) -> List[Dict[str, Any]]:
+        """Итоги по типам тренировок."""
+        where, params = _where(athlete, None, start, end)
+        return self._totals_by('training_type', params, where)
+
+    def messages(self,
+                 athlete: Optional[str] = None,
+                 training_type: Optional[str] = None,
+                 start: Optional[float] = None,
+                 end: Optional[float] = None,
+                 ) -> Iterator[InfoMessage]:
+        """Сохранённые сообщения в порядке времени тренировок."""
+        where, params = _where(athlete, training_type, start, end)
+        rows = self.connection.execute(
+            'SELECT training_type, duration, distance, speed, calories '
+            f'FROM workouts {where} ORDER BY timestamp, id', params)
+        for row in rows:
+            yield InfoMessage(*row)
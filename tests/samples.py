@@ -0,0 +1,49 @@
+"""Общие пакеты и генераторы данных для тестов."""
+import random
+
+import homework
+from ingest import Packet
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+]
+
+EDGE_PACKAGES = [
+    ('RUN', [1206, 12, 6]),
+    ('SWM', [1206, 12, 6, 12, 6]),
+    ('WLK', [420, 4, 20, 42]),
+]
+
+
+def csv_line(package):
+    """Строка CSV для пакета (код тренировки, показания)."""
+    workout_type, data = package[:2]
+    return ','.join(map(str, [workout_type, *data]))
+
+
+LINES = [csv_line(package) for package in PACKAGES]
+
+
+def info(package):
+    """Эталонное сообщение `show_training_info` для пакета."""
+    workout_type, data = package[:2]
+    return homework.read_package(workout_type, data).show_training_info()
+
+
+def random_packets(count, seed=0, codes=('SWM', 'RUN', 'WLK'),
+                   athletes=17):
+    """Воспроизводимый поток случайных пакетов с атлетом и временем."""
+    rnd = random.Random(seed)
+    packets = []
+    for i in range(count):
+        code = rnd.choice(codes)
+        data = [rnd.randint(1, 30000), round(rnd.uniform(0.1, 5), 3),
+                rnd.randint(40, 120)]
+        if code == 'WLK':
+            data.append(rnd.randint(140, 210))
+        if code == 'SWM':
+            data.extend([rnd.randint(10, 50), rnd.randint(1, 80)])
+        packets.append(Packet(code, data, f'a{i % athletes}', float(i)))
+    return packets
@@ -0,0 +1,99 @@
+import pytest
+
+import aggregate
+from ingest import Packet
+from samples import info
+
+DAY = aggregate.DAY
+
+
+def packets():
+    return [
+        Packet('RUN', [15000, 1, 75], 'ann', 0),
+        Packet('RUN', [9000, 1, 75], 'ann', 3 * DAY),
+        Packet('SWM', [720, 1, 80, 25, 40], 'ann', 10 * DAY),
+        Packet('WLK', [9000, 1, 75, 180], 'bob', 10 * DAY),
+    ]
+
+
+@pytest.fixture
+def aggregator():
+    result = aggregate.Aggregator()
+    assert result.update_many(packets()) == 4
+    return result
+
+
+def test_totals(aggregator):
+    stats = aggregator.stats('ann', 'Running')
+    first, second = info(packets()[0]), info(packets()[1])
+    assert stats['count'] == 2
+    assert stats['distance'] == first.distance + second.distance
+    assert stats['calories'] == first.calories + second.calories
+    assert stats['mean_distance'] == stats['distance'] / 2
+    assert aggregator.stats('ann')['count'] == 3
+    assert aggregator.stats(training_type='Running')['count'] == 2
+    assert aggregator.stats('nobody')['count'] == 0
+
+
+def test_global_totals(aggregator):
+    stats = aggregator.stats()
+    messages = [info(packet) for packet in packets()]
+    assert stats['count'] == len(messages), (
+        'Общий итог должен учитывать все тренировки')
+    assert stats['calories'] == pytest.approx(
+        sum(m.calories for m in messages))
+    assert stats['30d']['count'] == 4
+
+
+def test_rolling_windows(aggregator):
+    ann = aggregator.stats('ann')
+    assert ann['30d']['count'] == 3
+    assert ann['7d']['count'] == 1
+    assert ann['7d']['calories'] == pytest.approx(info(packets()[2]).calories)
+    later = aggregator.stats('ann', now=45 * DAY)
+    assert later['30d']['count'] == 0
+    assert later['count'] == 3
+    assert aggregator.stats('ann') == ann, (
+        'Запрос на момент `now` не должен менять окна'
+    )
+
+
+def test_late_event_inside_window():
+    window = aggregate.RollingWindow(10, buckets=10)
+    window.add(100, 1, 1, 1)
+    window.add(95, 1, 2, 1)
+    window.add(80, 1, 4, 1)
+    assert sorted(window.buckets) == [95, 100]
+    assert window.totals.distance == 3
+    window.add(106, 1, 8, 1)
+    assert window.totals.distance == 9
+
+
+def test_window_memory_is_bounded():
+    window = aggregate.RollingWindow(7 * DAY, buckets=24)
+    for second in range(0, 30 * DAY, 60):
+        window.add(second, 1, 1, 1)
+    assert len(window.buckets) <= 24, (
+        'Окно должно хранить не больше `buckets` корзин'
+    )
+    width = window.width // 60
+    assert 7 * DAY // 60 - width <= window.totals.count <= 7 * DAY // 60
+
+
+def test_snapshot_restore(aggregator, tmp_path):
+    path = tmp_path / 'snapshot.json'
+    aggregator.save(str(path))
+    restored = aggregate.Aggregator.load(str(path))
+    assert sorted(restored.keys()) == sorted(aggregator.keys())
+    for athlete, training_type in aggregator.keys():
+        assert (restored.stats(athlete, training_type)
+                == aggregator.stats(athlete, training_type))
+    extra = Packet('RUN', [1000, 1, 75], 'ann', 11 * DAY)
+    restored.update_packet(extra)
+    aggregator.update_packet(extra)
+    assert restored.stats('ann') == aggregator.stats('ann')
+
+
+def test_restore_unknown_version():
+    with pytest.raises(ValueError):
+        aggregate.Aggregator.restore({'version': 0})
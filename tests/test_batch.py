@@ -0,0 +1,61 @@
+import pytest
+
+import batch
+import homework
+from samples import EDGE_PACKAGES, PACKAGES, info, random_packets
+
+SAMPLE = PACKAGES + EDGE_PACKAGES
+
+
+def to_columns(packages):
+    columns = {name: [] for name in ('action', 'duration', 'weight',
+                                     'height', 'length_pool', 'count_pool')}
+    codes = []
+    for workout_type, data in packages:
+        codes.append(workout_type)
+        row = dict(zip(('action', 'duration', 'weight'), data))
+        if workout_type == 'WLK':
+            row['height'] = data[3]
+        if workout_type == 'SWM':
+            row['length_pool'], row['count_pool'] = data[3], data[4]
+        for name, column in columns.items():
+            column.append(row.get(name, 0))
+    return codes, columns
+
+
+@pytest.mark.parametrize('packages', [
+    SAMPLE,
+    SAMPLE[1:2] * 3,
+    [packet[:2] for packet in random_packets(500)],
+])
+def test_compute_batch_matches_classes(packages):
+    codes, columns = to_columns(packages)
+    result = batch.compute_batch(codes, **columns)
+    for i, (workout_type, data) in enumerate(packages):
+        training = homework.read_package(workout_type, data)
+        assert result.distance[i] == training.get_distance(), (
+            'Пакетная дистанция должна совпадать с `get_distance`'
+        )
+        assert result.speed[i] == training.get_mean_speed(), (
+            'Пакетная скорость должна совпадать с `get_mean_speed`'
+        )
+        assert result.calories[i] == training.get_spent_calories(), (
+            'Пакетные калории должны совпадать с `get_spent_calories`'
+        )
+
+
+def test_iter_messages():
+    codes, columns = to_columns(SAMPLE)
+    result = batch.compute_batch(codes, **columns)
+    messages = list(batch.iter_messages(codes, columns['duration'], result))
+    assert messages == [info(package) for package in SAMPLE]
+
+
+def test_compute_batch_unknown_code():
+    with pytest.raises(ValueError):
+        batch.compute_batch(['BOX'], [1], [1], [1])
+
+
+def test_compute_batch_missing_column():
+    with pytest.raises(ValueError):
+        batch.compute_batch(['WLK'], [9000], [1], [75])
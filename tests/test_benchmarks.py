@@ -0,0 +1,54 @@
+import json
+
+from benchmarks import suite
+
+
+def test_run_suite_keys():
+    results = suite.run_suite([10], ['mixed'], repeat=1, memory=True)
+    assert set(results) == {f'{stage}/mixed/10' for stage in suite.STAGES}
+    for result in results.values():
+        assert result['throughput'] > 0
+        assert result['peak_bytes_per_packet'] >= 0
+
+
+def test_blocks_cover_size(monkeypatch):
+    blocks = list(suite.packet_blocks(25, ('RUN', 'WLK'), block_size=10))
+    assert [len(block) for block in blocks] == [10, 10, 5]
+    assert sum(blocks, []) == next(suite.packet_blocks(25, ('RUN', 'WLK'))), (
+        'Блоки должны давать те же строки, что и один блок')
+    monkeypatch.setattr(suite, 'BLOCK_SIZE', 10)
+    results = suite.run_suite([25], ['RUN'], repeat=1, memory=False,
+                              stage_names=['end_to_end'])
+    assert results['end_to_end/RUN/25']['throughput'] > 0
+
+
+def test_compare_detects_regressions():
+    baseline = {
+        'parse/RUN/1000': {'throughput': 100.0,
+                           'peak_bytes_per_packet': 10.0},
+        'batch/RUN/1000': {'throughput': 100.0},
+    }
+    results = {
+        'parse/RUN/1000': {'throughput': 85.0,
+                           'peak_bytes_per_packet': 13.0},
+        'batch/RUN/1000': {'throughput': 70.0},
+        'new/RUN/1000': {'throughput': 1.0},
+    }
+    regressions = suite.compare(results, baseline, threshold=0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('batch/RUN/1000')
+    assert 'байт/пакет' in regressions[1]
+
+
+def test_main_baseline_roundtrip(tmp_path, capsys):
+    path = tmp_path / 'baseline.json'
+    arguments = ['--sizes', '1', '--workloads', 'RUN', '--repeat', '1',
+                 '--stages', 'parse,batch', '--no-memory']
+    assert suite.main(arguments + ['--save', str(path)]) == 0
+    saved = json.loads(path.read_text())
+    assert set(saved['results']) == {'parse/RUN/10', 'batch/RUN/10'}
+    for result in saved['results'].values():
+        result['throughput'] *= 1000
+    path.write_text(json.dumps(saved))
+    assert suite.main(arguments + ['--baseline', str(path)]) == 1
+    assert 'РЕГРЕССИЯ' in capsys.readouterr().err
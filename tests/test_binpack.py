@@ -0,0 +1,95 @@
+import io
+
+import pytest
+
+import binpack
+from ingest import Packet
+from samples import EDGE_PACKAGES, PACKAGES, info
+
+SAMPLE = PACKAGES + EDGE_PACKAGES
+
+
+@pytest.fixture
+def packet_file(tmp_path):
+    path = tmp_path / 'packets.bin'
+    with open(path, 'wb') as out:
+        count = binpack.write_packets(out, [Packet(*p) for p in SAMPLE])
+    assert count == len(SAMPLE)
+    with binpack.PacketFile(str(path)) as packets:
+        yield packets
+
+
+def test_record_layout():
+    assert binpack.HEADER.size == 16
+    assert binpack.RECORD.size == 56
+
+
+def test_columns(packet_file):
+    assert len(packet_file) == len(SAMPLE)
+    assert packet_file.codes() == [p[0] for p in SAMPLE]
+    action = packet_file.column('action')
+    assert action.tolist() == [p[1][0] for p in SAMPLE]
+    assert packet_file.column('height').tolist() == [0, 0, 180, 0, 0, 42]
+    action.release()
+
+
+def test_iter_packets_roundtrip(packet_file):
+    restored = [(p.workout_type, p.data) for p in packet_file.iter_packets()]
+    assert restored == SAMPLE
+
+
+def test_compute_matches_read_package(packet_file):
+    result = packet_file.compute()
+    for i, package in enumerate(SAMPLE):
+        message = info(package)
+        assert (result.distance[i], result.speed[i],
+                result.calories[i]) == (message.distance, message.speed,
+                                        message.calories)
+
+
+def test_convert(tmp_path):
+    source = tmp_path / 'packets.csv'
+    source.write_text('RUN,15000,1,75\nWLK,9000,1,75,180\n')
+    target = tmp_path / 'packets.bin'
+    assert binpack.convert(str(source), str(target)) == 2
+    with binpack.PacketFile(str(target)) as packets:
+        assert packets.codes() == ['RUN', 'WLK']
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.bin'
+    with open(path, 'wb') as out:
+        binpack.write_packets(out, [])
+    with binpack.PacketFile(str(path)) as packets:
+        assert len(packets) == 0
+        assert list(packets.compute().calories) == []
+
+
+@pytest.mark.parametrize('packet', [
+    Packet('BOX', [1, 1, 1]),
+    Packet('RUN', [1, 1]),
+])
+def test_encode_invalid_packet(packet):
+    with pytest.raises(ValueError):
+        binpack.write_packets(io.BytesIO(), [packet])
+
+
+@pytest.mark.parametrize('content', [b'', b'FTPK', b'x' * 32])
+def test_not_a_packet_file(tmp_path, content):
+    path = tmp_path / 'bad.bin'
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        binpack.PacketFile(str(path))
+
+
+@pytest.mark.parametrize('type_id', [0, len(binpack.TYPE_CODES) + 1])
+def test_unknown_type_id(tmp_path, type_id):
+    path = tmp_path / 'packets.bin'
+    path.write_bytes(binpack.HEADER.pack(binpack.MAGIC, binpack.VERSION,
+                                         binpack.RECORD.size, 1)
+                     + binpack.RECORD.pack(type_id, *[1.0] * 6))
+    with binpack.PacketFile(str(path)) as packets:
+        with pytest.raises(ValueError):
+            packets.codes()
+        with pytest.raises(ValueError):
+            list(packets.iter_packets())
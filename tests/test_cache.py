@@ -0,0 +1,93 @@
+import pytest
+
+import cache
+import homework
+import registry
+from ingest import Packet
+from samples import info
+
+PACKETS = [
+    Packet('RUN', [15000, 1, 75]),
+    Packet('RUN', [15000.0, 1.0, 75.0]),
+    Packet('WLK', [9000, 1, 75, 180]),
+    Packet('RUN', [15000, 1, 75], 'ann', 100.0),
+]
+
+
+def test_repeats_hit_cache():
+    results = cache.ResultCache()
+    assert list(cache.iter_cached(PACKETS, results)) == [
+        info(p) for p in PACKETS]
+    assert (results.stats.hits, results.stats.misses) == (2, 2)
+    assert results.stats.hit_rate == 0.5
+
+
+def test_drop_duplicates():
+    results = cache.ResultCache()
+    messages = list(cache.iter_cached(PACKETS, results,
+                                      drop_duplicates=True))
+    assert messages == [info(PACKETS[0]), info(PACKETS[2]),
+                        info(PACKETS[3])], (
+        'Повторы пакетов не должны попадать в вывод, а такая же '
+        'тренировка другого спортсмена - должна')
+
+
+def test_coefficient_change_invalidates(tmp_path, monkeypatch):
+    path = str(tmp_path / 'results.db')
+    packet = PACKETS[0]
+    with cache.ResultCache(path=path) as results:
+        results.compute(packet)
+        monkeypatch.setattr(homework.Running, 'COEFF_CALORIE_1', 19)
+        computed, cached = results.compute(packet)
+        assert not cached, 'После смены коэффициента нужен новый расчёт'
+        assert computed == info(packet)
+    monkeypatch.undo()
+    with cache.ResultCache(path=path) as results:
+        assert results.compute(packet) == (info(packet), True)
+        monkeypatch.setattr(homework.Running, 'COEFF_CALORIE_1', 19)
+        assert results.compute(packet) == (info(packet), True)
+
+
+def test_lru_eviction():
+    results = cache.ResultCache(max_size=2)
+    keys = [cache.packet_key(Packet('RUN', [n, 1, 75])) for n in range(3)]
+    for key in keys[:2]:
+        results.put(key, info(Packet('RUN', [1, 1, 75])))
+    assert results.lookup(keys[0]) is not None
+    results.put(keys[2], info(Packet('RUN', [1, 1, 75])))
+    assert results.stats.evictions == 1
+    assert results.lookup(keys[1]) is None, (
+        'Вытесняться должен давно не использованный результат')
+    assert len(results) == 2
+
+
+def test_disk_tier(tmp_path):
+    path = str(tmp_path / 'results.db')
+    with cache.ResultCache(max_size=1, path=path) as results:
+        list(cache.iter_cached(PACKETS[:3], results))
+    with cache.ResultCache(path=path) as results:
+        assert list(cache.iter_cached(PACKETS, results)) == [
+            info(p) for p in PACKETS]
+        assert results.stats.misses == 0
+        assert results.stats.disk_hits == 2
+
+
+def test_errors_are_not_cached():
+    results = cache.ResultCache()
+    with pytest.raises(ValueError):
+        results.compute(Packet('BOX', [1, 1, 1]))
+    assert len(results) == 0
+
+
+def test_redefined_workout_invalidates():
+    results = cache.ResultCache()
+    packet = Packet('CYC', [3000, 0.5, 70])
+    for factor in (2, 3):
+        registry.define_workout('CYC', 'Cycling', homework.Training,
+                                calories=f'weight * {factor}')
+        try:
+            computed, cached = results.compute(packet)
+        finally:
+            registry.unregister_workout('CYC')
+        assert not cached, 'После смены формулы нужен новый расчёт'
+        assert computed.calories == 70 * factor
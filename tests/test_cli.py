@@ -0,0 +1,138 @@
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import binpack
+import cli
+import report
+import samples
+from ingest import iter_info, iter_packets
+
+ROOT = Path(__file__).resolve().parent.parent
+LINES = samples.LINES * 5
+COLD_START_RUNS = 5
+HEAVY_MODULES = ('concurrent.futures', 'multiprocessing', 'mmap', 'sqlite3',
+                 'asyncio', 'cProfile', 'binpack', 'parallel', 'validate',
+                 'columnar')
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'packets.csv'
+    path.write_text('\n'.join(LINES) + '\n')
+    return path
+
+
+def expected(fmt='text'):
+    stream = io.StringIO()
+    report.write_report(iter_info(iter_packets(LINES)), stream, fmt)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize('options', [
+    [],
+    ['-w', '2', '-b', '4'],
+])
+@pytest.mark.parametrize('fmt', ['text', 'csv', 'jsonl'])
+def test_csv_file(source, tmp_path, options, fmt):
+    output = tmp_path / 'report'
+    assert cli.main([str(source), '-o', fmt, '--output', str(output),
+                     *options]) == 0
+    assert output.read_text() == expected(fmt)
+
+
+def test_jsonl_stdin(monkeypatch, capsys):
+    text = ''.join(json.dumps({'type': p.workout_type, 'data': p.data})
+                   + '\n' for p in iter_packets(LINES))
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(text))
+    assert cli.main(['-f', 'jsonl']) == 0
+    assert capsys.readouterr().out == expected()
+
+
+def test_binary_file(source, tmp_path, capsys):
+    target = tmp_path / 'packets.bin'
+    binpack.convert(str(source), str(target))
+    assert cli.main(['-f', 'bin', str(target)]) == 0
+    assert capsys.readouterr().out == expected()
+
+
+def test_rejects(source, tmp_path, capsys):
+    source.write_text(source.read_text() + 'RUN,1,0,75\nBOX,1\n')
+    rejects = tmp_path / 'rejects.jsonl'
+    assert cli.main([str(source), '--rejects', str(rejects)]) == 0
+    assert capsys.readouterr().out == expected()
+    reasons = [json.loads(line)['reason']
+               for line in rejects.read_text().splitlines()]
+    assert reasons == ['not_positive', 'unknown_type']
+
+
+def test_metrics(source, tmp_path, capsys):
+    metrics = tmp_path / 'metrics.json'
+    try:
+        assert cli.main([str(source), '--metrics', str(metrics)]) == 0
+    finally:
+        import instrument
+        instrument.disable()
+        instrument.METRICS.reset()
+    assert json.loads(metrics.read_text())['parse']['calls'] == len(LINES)
+
+
+@pytest.mark.parametrize('line, fmt, message', [
+    ('BOX,1,1,1', 'csv', 'BOX'),
+    ('{"data": [15000, 1, 75]}', 'jsonl', 'type'),
+    ('WLK,1e200,1,75,180', 'csv', 'Ошибка'),
+])
+def test_error_exit_code(source, capsys, line, fmt, message):
+    source.write_text(line + '\n')
+    assert cli.main([str(source), '-f', fmt]) == 1
+    assert message in capsys.readouterr().err
+
+
+def test_batch_size_with_workers(source, tmp_path, monkeypatch):
+    import parallel
+    sizes = []
+
+    def process_packets(packets, workers, chunk_size):
+        sizes.append(chunk_size)
+        return iter_info(packets)
+
+    monkeypatch.setattr(parallel, 'process_packets', process_packets)
+    output = tmp_path / 'report'
+    assert cli.main([str(source), '-w', '2', '-b', '4', '--output',
+                     str(output)]) == 0
+    assert sizes == [4], 'Размер порции должен передаваться процессам'
+    assert output.read_text() == expected()
+
+
+def test_cold_start(source):
+    code = (
+        'import sys, time\n'
+        'start = time.perf_counter()\n'
+        'import cli\n'
+        f'cli.main([{str(source)!r}, "--output", "/dev/null"])\n'
+        'print(time.perf_counter() - start)\n'
+        f'print(sorted(set(sys.modules) & set({HEAVY_MODULES!r})))\n'
+    )
+    runs = [subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                           capture_output=True, text=True, check=True)
+            for _ in range(COLD_START_RUNS)]
+    elapsed, heavy = zip(*(run.stdout.splitlines() for run in runs))
+    assert heavy[0] == '[]', (
+        f'Обычный запуск не должен импортировать {heavy[0]}')
+    assert min(map(float, elapsed)) < cli.STARTUP_BUDGET, (
+        f'Лучший из {COLD_START_RUNS} холодных стартов дольше '
+        f'{cli.STARTUP_BUDGET} с')
+
+
+def test_columnar_output(source, tmp_path):
+    import columnar
+    output = tmp_path / 'results.ftcl'
+    assert cli.main([str(source), '-o', 'ftcl', '--output',
+                     str(output)]) == 0
+    columns = columnar.read_columns(str(output))
+    assert list(columns['calories']) == [
+        m.calories for m in iter_info(iter_packets(LINES))]
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+import cluster
+import homework
+import ingest
+from ingest import Packet
+from samples import csv_line, random_packets
+
+
+@pytest.fixture(scope='module')
+def packets():
+    return random_packets(300, seed=3)
+
+
+@pytest.fixture(scope='module')
+def packet_file(packets, tmp_path_factory):
+    path = tmp_path_factory.mktemp('cluster') / 'packets.csv'
+    path.write_text(''.join(csv_line(p) + '\n' for p in packets))
+    return str(path)
+
+
+def serial(packets):
+    return list(ingest.iter_info(packets))
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_file_ranges_match_serial(packets, packet_file, workers):
+    result = cluster.process_file(packet_file, workers=workers,
+                                  shard_bytes=500, timeout=30)
+    assert result == serial(packets), (
+        'Результат не должен зависеть от числа рабочих')
+
+
+def test_athlete_partitions_match_serial(packets):
+    result = cluster.process_by_athlete(packets, partitions=5, workers=2,
+                                        timeout=30)
+    assert result == serial(packets)
+
+
+def test_athlete_partitions_are_disjoint(packets):
+    groups = cluster.athlete_partitions(packets, 4)
+    assert sorted(i for group in groups for i in group) == list(
+        range(len(packets)))
+    for group in groups:
+        athletes = {packets[i].athlete for i in group}
+        for other in groups:
+            if other is not group:
+                assert not athletes & {packets[i].athlete for i in other}
+
+
+def test_coefficients(packets, monkeypatch):
+    coefficients = {'RUN': {'COEFF_CALORIE_1': 20}}
+    result = cluster.process_by_athlete(packets, 3, coefficients=coefficients,
+                                        timeout=30)
+    assert homework.Running.COEFF_CALORIE_1 == 18
+    monkeypatch.setattr(homework.Running, 'COEFF_CALORIE_1', 20)
+    assert result == serial(packets)
+
+
+def test_unknown_coefficient():
+    with pytest.raises(ValueError):
+        with cluster.coefficients_applied({'RUN': {'COEFF_X': 1}}):
+            pass
+
+
+async def failing_worker(host, port, stall=False, reply=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(cluster.encode({'op': 'ready'}))
+    await writer.drain()
+    await cluster._read(reader)
+    if stall:
+        await asyncio.sleep(0.5)
+    if reply is not None:
+        writer.write(reply)
+        await writer.drain()
+        await asyncio.sleep(0.05)
+    writer.close()
+
+
+@pytest.mark.parametrize('stall, reply', [
+    (False, None),
+    (True, None),
+    (False, cluster.encode({'op': 'result'})),
+    (False, cluster.encode({'op': 'result', 'id': 0, 'messages': None})),
+    (False, b'\0\0\0\2{]'),
+    (False, cluster.encode({'op': 'failed', 'id': 0,
+                            'message': 'MemoryError: '})),
+    (False, cluster.encode({'op': 'error', 'id': 0, 'error': 'SystemExit',
+                            'message': ''})),
+])
+def test_failed_worker_partition_is_reassigned(packets, packet_file, stall,
+                                               reply):
+    tasks = cluster.range_tasks(packet_file, shard_bytes=2000)
+
+    async def scenario():
+        coordinator = cluster.Coordinator(tasks, task_timeout=0.2)
+        host, port = await coordinator.start()
+        await failing_worker(host, port, stall, reply)
+        processes.extend(cluster.start_workers(1, host, port))
+        try:
+            return coordinator, await asyncio.wait_for(
+                coordinator.wait(), 30)
+        finally:
+            await coordinator.close()
+
+    processes = []
+    coordinator, result = asyncio.run(scenario())
+    for process in processes:
+        process.join(5)
+        assert process.exitcode == 0
+    assert coordinator.reassigned == 1, (
+        'Раздел упавшего рабочего должен уйти другому рабочему')
+    messages = [homework.InfoMessage(*row) for rows in result for row in rows]
+    assert messages == serial(packets)
+
+
+@pytest.mark.parametrize('packet, error', [
+    (Packet('BOX', [1, 1, 1], 'ann'), ValueError),
+    (Packet('WLK', [1e200, 1, 75, 180], 'ann'), OverflowError),
+])
+def test_worker_error_is_reported(packet, error):
+    with pytest.raises(error):
+        cluster.process_by_athlete([packet], timeout=30)
+
+
+def test_environment_failure_is_not_data_error(tmp_path):
+    task = cluster.range_tasks(__file__)[0]
+    task['path'] = str(tmp_path / 'missing.csv')
+    reply = cluster._result({'id': 0, 'task': task})
+    assert reply['op'] == 'failed', (
+        'Отсутствие файла у рабочего - сбой окружения, а не ошибка данных')
+    with pytest.raises(RuntimeError):
+        cluster.run_local([task], workers=2, timeout=30)
+
+
+def test_all_workers_gone(packet_file):
+    tasks = cluster.range_tasks(packet_file, shard_bytes=2000)
+
+    async def scenario():
+        coordinator = cluster.Coordinator(tasks, workers=1)
+        host, port = await coordinator.start()
+        await failing_worker(host, port)
+        try:
+            await asyncio.wait_for(coordinator.wait(), 5)
+        finally:
+            await coordinator.close()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario())
+
+
+def test_no_tasks():
+    assert cluster.run_local([], workers=1, timeout=5) == []
@@ -0,0 +1,78 @@
+import pytest
+
+import columnar
+import homework
+from samples import EDGE_PACKAGES, PACKAGES, info
+
+SAMPLE = (PACKAGES + EDGE_PACKAGES) * 2
+
+
+@pytest.fixture
+def messages():
+    return [info(package) for package in SAMPLE]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 1000])
+def test_roundtrip_full_precision(messages, tmp_path, chunk_size):
+    path = str(tmp_path / 'results.ftcl')
+    assert columnar.write_columns(messages, path,
+                                  chunk_size=chunk_size) == len(messages)
+    columns = columnar.read_columns(path)
+    restored = [homework.InfoMessage(*row) for row in zip(
+        columns['training_type'],
+        *(columns[name] for name in columnar.NUMBER_FIELDS))]
+    assert restored == messages, 'Значения должны сохраняться без округления'
+
+
+def test_chunks(messages, tmp_path):
+    path = str(tmp_path / 'results.ftcl')
+    with columnar.ColumnarWriter(path, chunk_size=5) as writer:
+        for message in messages:
+            writer.write(message)
+    sizes = [len(chunk['calories']) for chunk in columnar.iter_chunks(path)]
+    assert sizes == [5, 5, 2]
+
+
+def test_empty(tmp_path):
+    path = str(tmp_path / 'empty.ftcl')
+    assert columnar.write_columns([], path) == 0
+    assert list(columnar.iter_chunks(path)) == []
+
+
+@pytest.mark.parametrize('content', [b'', b'NOPE' + b'\0' * 10])
+def test_not_ftcl(tmp_path, content):
+    path = tmp_path / 'bad.ftcl'
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        list(columnar.iter_chunks(str(path)))
+
+
+def test_failed_export_leaves_no_file(messages, tmp_path):
+    path = tmp_path / 'results.ftcl'
+
+    def failing():
+        yield from messages
+        raise ValueError('обрыв')
+
+    with pytest.raises(ValueError):
+        columnar.write_columns(failing(), str(path), chunk_size=5)
+    assert list(tmp_path.iterdir()) == [], (
+        'Прерванная выгрузка не должна оставлять файлов')
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        columnar.ColumnarWriter(str(tmp_path / 'x'), 'orc')
+
+
+@pytest.mark.skipif(columnar.pyarrow is None, reason='нет pyarrow')
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_arrow_formats(messages, tmp_path, fmt):
+    path = str(tmp_path / f'results.{fmt}')
+    columnar.write_columns(messages, path, fmt, chunk_size=5)
+    if fmt == 'parquet':
+        table = columnar.pyarrow.parquet.read_table(path)
+    else:
+        table = columnar.pyarrow.ipc.open_file(path).read_all()
+    assert table.column('calories').to_pylist() == [
+        m.calories for m in messages]
@@ -0,0 +1,55 @@
+import pytest
+
+import compact
+import homework
+from samples import PACKAGES
+
+
+@pytest.mark.parametrize('workout_type, data', PACKAGES)
+def test_slotted_matches_original(workout_type, data):
+    slotted = compact.read_package_slotted(workout_type, data)
+    original = homework.read_package(workout_type, data)
+    assert not hasattr(slotted, '__dict__'), (
+        'У компактной тренировки не должно быть `__dict__`'
+    )
+    assert isinstance(slotted, compact.SlotTraining)
+    assert slotted.show_training_info() == original.show_training_info()
+
+
+def test_slotted_arity():
+    with pytest.raises(TypeError):
+        compact.read_package_slotted('RUN', [15000, 1])
+
+
+def test_info_message_has_no_dict():
+    info = homework.InfoMessage('Running', 1, 2, 3, 4)
+    assert not hasattr(info, '__dict__')
+
+
+@pytest.mark.parametrize('workout_type, data', PACKAGES)
+def test_training_batch_rows(workout_type, data):
+    batch = compact.TrainingBatch(workout_type, [data, data])
+    original = homework.read_package(workout_type, data)
+    assert len(batch) == 2
+    row = batch[-1]
+    assert isinstance(row, type(original))
+    assert row.show_training_info() == original.show_training_info()
+    assert batch.show_training_info() == [original.show_training_info()] * 2
+
+
+def test_training_batch_row_writes_through():
+    batch = compact.TrainingBatch('RUN', [[15000, 1, 75]])
+    batch[0].duration = 2
+    assert batch.column('duration')[0] == 2
+    expected = homework.Running(15000, 2, 75).get_spent_calories()
+    assert batch.compute().calories[0] == expected
+
+
+def test_training_batch_errors():
+    with pytest.raises(ValueError):
+        compact.TrainingBatch('BOX')
+    batch = compact.TrainingBatch('WLK')
+    with pytest.raises(TypeError):
+        batch.append([9000, 1, 75])
+    with pytest.raises(IndexError):
+        batch[0]
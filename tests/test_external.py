@@ -0,0 +1,112 @@
+import random
+import time
+import tracemalloc
+
+import pytest
+
+import aggregate
+import external
+from ingest import Packet
+
+LIMIT = 64 * 1024
+
+
+def rows(count, seed=5):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield external.Row(f'a{rnd.randint(0, 99)}', rnd.uniform(0, 6e7),
+                           rnd.choice(['Running', 'Swimming']), 1.0,
+                           rnd.random(), round(rnd.random(), 1),
+                           rnd.random() * 500)
+
+
+@pytest.mark.parametrize('by', ['calories', 'speed', 'athlete',
+                                'training_type'])
+@pytest.mark.parametrize('reverse', [False, True])
+def test_sort_matches_sorted(by, reverse):
+    stats = external.SpillStats()
+    result = list(external.external_sort(rows(5000), by, reverse,
+                                         memory_limit=LIMIT, fan_in=4,
+                                         stats=stats))
+    assert result == sorted(rows(5000), key=lambda row: getattr(row, by),
+                            reverse=reverse), (
+        'Внешняя сортировка должна совпадать с устойчивой sorted')
+    assert stats.runs > 4 and stats.merge_passes > 1
+
+
+def test_sort_in_memory():
+    stats = external.SpillStats()
+    assert list(external.external_sort(rows(10), stats=stats)) == sorted(
+        rows(10), key=lambda row: row.calories)
+    assert stats.runs == 0
+    assert list(external.external_sort([])) == []
+
+
+@pytest.mark.parametrize('by', [
+    ('athlete', 'training_type', 'period'),
+    ('training_type',),
+    ('period', 'athlete'),
+])
+def test_group_by_matches_in_memory(by):
+    stats = external.SpillStats()
+    result = dict(external.external_group_by(rows(5000), by, 'month',
+                                             memory_limit=LIMIT // 4,
+                                             fan_in=3, stats=stats))
+    expected = {}
+    for row in rows(5000):
+        values = {'athlete': row.athlete,
+                  'training_type': row.training_type,
+                  'period': time.strftime('%Y-%m', time.gmtime(row.timestamp))}
+        key = tuple(values[name] for name in by)
+        expected.setdefault(key, aggregate.Totals()).add(
+            row.duration, row.distance, row.calories)
+    assert list(result) == sorted(expected), 'Группы идут в порядке ключей'
+    for key, totals in expected.items():
+        assert result[key] == pytest.approx(totals.as_dict())
+    if len(expected) > 100:
+        assert stats.runs > 0
+
+
+@pytest.mark.parametrize('count', [5_000, 20_000])
+def test_peak_memory_under_limit(count):
+    limit = 128 * 1024
+    for run in (lambda size: external.external_sort(rows(size),
+                                                    memory_limit=limit),
+                lambda size: external.external_group_by(rows(size),
+                                                        period='day',
+                                                        memory_limit=limit)):
+        for _ in run(2000):
+            pass
+        tracemalloc.start()
+        for _ in run(count):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert peak < limit, f'Пик памяти {peak} больше предела {limit}'
+
+
+def test_spill_files_removed(tmp_path):
+    sorted_rows = external.external_sort(rows(5000), memory_limit=LIMIT,
+                                         tmpdir=str(tmp_path))
+    next(sorted_rows)
+    assert list(tmp_path.iterdir())
+    sorted_rows.close()
+    assert list(tmp_path.iterdir()) == [], (
+        'Временные серии должны удаляться')
+
+
+def test_iter_rows():
+    row, = external.iter_rows([Packet('RUN', [15000, 1, 75], 'ann', 5.0)])
+    assert (row.athlete, row.timestamp, row.training_type) == (
+        'ann', 5.0, 'Running')
+
+
+@pytest.mark.parametrize('call', [
+    lambda: list(external.external_sort(rows(1), by='weight')),
+    lambda: list(external.external_group_by(rows(1), by=('weight',))),
+    lambda: list(external.external_group_by(rows(1), period='decade')),
+    lambda: list(external.external_sort(rows(1), memory_limit=0)),
+])
+def test_invalid_arguments(call):
+    with pytest.raises(ValueError):
+        call()
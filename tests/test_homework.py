@@ -363,3 +363,70 @@ def test_main_output(input_data, expected):
     assert get_message_output == expected, (
         'Метод `main` должен печатать результат в консоль.\n'
     )
+
+
+@pytest.fixture
+def metric_cache():
+    homework.set_metric_cache(True)
+    homework.metric_cache_stats.reset()
+    yield homework.metric_cache_stats
+    homework.set_metric_cache(False)
+    homework.metric_cache_stats.reset()
+
+
+@pytest.mark.parametrize('input_data', [
+    ['SWM', [720, 1, 80, 25, 40]],
+    ['RUN', [15000, 1, 75]],
+    ['WLK', [9000, 1, 75, 180]],
+])
+def test_metric_cache_hits(metric_cache, input_data):
+    training = homework.read_package(*input_data)
+    first = training.show_training_info()
+    misses = metric_cache.misses
+    assert training.show_training_info() == first
+    assert metric_cache.misses == misses, (
+        'Повторный расчёт показателей должен браться из кэша'
+    )
+    assert metric_cache.hits >= 3
+
+
+@pytest.mark.parametrize('input_data, field, value', [
+    (['SWM', [720, 1, 80, 25, 40]], 'count_pool', 20),
+    (['SWM', [720, 1, 80, 25, 40]], 'length_pool', 50),
+    (['RUN', [15000, 1, 75]], 'action', 9000),
+    (['RUN', [15000, 1, 75]], 'duration', 2),
+    (['RUN', [15000, 1, 75]], 'weight', 60),
+    (['WLK', [9000, 1, 75, 180]], 'height', 150),
+])
+def test_metric_cache_invalidation(metric_cache, input_data, field, value):
+    training = homework.read_package(*input_data)
+    training.show_training_info()
+    setattr(training, field, value)
+    workout_type, data = input_data
+    fresh = homework.read_package(workout_type, data)
+    setattr(fresh, field, value)
+    expected = fresh.show_training_info()
+    assert training.show_training_info() == expected, (
+        'Кэш показателей должен сбрасываться при изменении полей'
+    )
+
+
+def test_metric_cache_coefficient_change(metric_cache, monkeypatch):
+    training = homework.read_package('RUN', [15000, 1, 75])
+    before = training.get_spent_calories()
+    monkeypatch.setattr(homework.Running, 'COEFF_CALORIE_1', 19)
+    assert training.get_spent_calories() != before, (
+        'Кэш показателей должен сбрасываться при изменении коэффициентов'
+    )
+
+
+def test_metric_cache_disabled_by_default():
+    homework.metric_cache_stats.reset()
+    homework.read_package('RUN', [15000, 1, 75]).show_training_info()
+    assert homework.metric_cache_stats.hits == 0
+    assert homework.metric_cache_stats.misses == 0
+    for name in homework.METRIC_METHODS:
+        assert not hasattr(getattr(homework.Running, name),
+                           'cached_metric'), (
+            'Без кэша методы показателей не должны оборачиваться'
+        )
@@ -0,0 +1,65 @@
+import io
+import json
+
+import pytest
+
+import ingest
+from samples import PACKAGES, info
+
+CSV_INPUT = (
+    '# type,action,duration,weight,...\n'
+    'SWM,720,1,80,25,40\n'
+    '\n'
+    'RUN,15000,1,75\n'
+    'WLK,9000,1,75,180\n'
+)
+
+JSONL_INPUT = ''.join(
+    json.dumps({'type': workout_type, 'data': data}) + '\n'
+    for workout_type, data in PACKAGES
+)
+
+
+@pytest.mark.parametrize('text, fmt', [
+    (CSV_INPUT, 'csv'),
+    (JSONL_INPUT, 'jsonl'),
+])
+def test_iter_packets(text, fmt):
+    packets = list(ingest.iter_packets(io.StringIO(text), fmt))
+    assert packets == [ingest.Packet(*package) for package in PACKAGES]
+
+
+def test_parse_csv_line_float_fields():
+    packet = ingest.parse_csv_line('RUN, 15000, 1.5, 75\n')
+    assert packet == ingest.Packet('RUN', [15000, 1.5, 75])
+
+
+def test_iter_info_matches_read_package():
+    messages = list(ingest.iter_info(
+        ingest.iter_packets(io.StringIO(CSV_INPUT))))
+    assert messages == [info(package) for package in PACKAGES]
+
+
+def test_iter_packets_is_lazy():
+    def lines():
+        yield 'RUN,15000,1,75\n'
+        raise AssertionError('Строки должны читаться по требованию')
+
+    packets = ingest.iter_packets(lines())
+    assert next(packets) == ingest.Packet('RUN', [15000, 1, 75])
+
+
+@pytest.mark.parametrize('chunk_size, sizes', [
+    (1, [1, 1, 1]),
+    (2, [2, 1]),
+    (10, [3]),
+])
+def test_process_stream_chunks(chunk_size, sizes):
+    chunks = list(ingest.process_stream(io.StringIO(CSV_INPUT),
+                                        chunk_size=chunk_size))
+    assert [len(chunk) for chunk in chunks] == sizes
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        list(ingest.iter_packets(io.StringIO(CSV_INPUT), 'xml'))
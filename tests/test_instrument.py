@@ -0,0 +1,92 @@
+import io
+import json
+import pstats
+
+import pytest
+
+import homework
+import ingest
+import instrument
+import report
+from samples import LINES
+
+
+@pytest.fixture
+def metrics():
+    instrument.METRICS.reset()
+    instrument.enable()
+    yield instrument.METRICS
+    instrument.disable()
+    instrument.METRICS.reset()
+
+
+def test_disabled_wrap_returns_function():
+    assert instrument.wrap('read_package',
+                           homework.read_package) is homework.read_package
+    assert all(stats['calls'] == 0
+               for stats in instrument.METRICS.snapshot().values())
+
+
+def test_pipeline_stages(metrics):
+    messages = list(ingest.iter_info(ingest.iter_packets(LINES)))
+    report.write_report(messages, io.StringIO(), 'csv')
+    snapshot = metrics.snapshot()
+    for stage in ('parse', 'read_package', 'show_training_info'):
+        assert snapshot[stage]['calls'] == len(LINES), (
+            f'Стадия {stage} должна быть вызвана для каждого пакета')
+        assert snapshot[stage]['errors'] == 0
+    assert snapshot['render']['calls'] == 1
+
+
+def test_errors_are_counted(metrics):
+    with pytest.raises(ValueError):
+        list(ingest.iter_info(ingest.iter_packets(['BOX,1,1,1'])))
+    stats = metrics.snapshot()['read_package']
+    assert (stats['calls'], stats['errors']) == (1, 1)
+
+
+def test_stage_context(metrics):
+    with instrument.stage('total'):
+        pass
+    with pytest.raises(KeyError):
+        with instrument.stage('total'):
+            raise KeyError
+    stats = metrics.snapshot()['total']
+    assert (stats['calls'], stats['errors']) == (2, 1)
+
+
+def test_reset_keeps_wrapped_stats(metrics):
+    parse = instrument.wrap('parse', ingest.parse_csv_line)
+    parse(LINES[0])
+    metrics.reset()
+    assert metrics.snapshot()['parse']['calls'] == 0
+    parse(LINES[1])
+    assert metrics.snapshot()['parse']['calls'] == 1, (
+        'Обёртки, созданные до сброса, должны считать в реестр'
+    )
+
+
+def test_export_json(metrics, tmp_path):
+    list(ingest.iter_packets(LINES))
+    path = tmp_path / 'metrics.json'
+    metrics.export_json(str(path))
+    assert json.loads(path.read_text())['parse']['calls'] == len(LINES)
+
+
+def test_profile_dump(tmp_path):
+    path = tmp_path / 'run.prof'
+    with instrument.profile(str(path)):
+        list(ingest.iter_info(ingest.iter_packets(LINES * 10)))
+    names = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert 'read_package' in names, (
+        'Профиль должен содержать функции конвейера')
+
+
+def test_sampling_profiler(tmp_path):
+    with instrument.SamplingProfiler(interval=0.0005) as profiler:
+        for _ in range(200):
+            list(ingest.iter_info(ingest.iter_packets(LINES * 20)))
+    assert profiler.top(), 'Профилировщик должен снять хотя бы одну выборку'
+    path = tmp_path / 'samples.txt'
+    profiler.dump(str(path))
+    assert path.read_text().count('\n') == len(profiler.samples)
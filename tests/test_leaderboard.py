@@ -0,0 +1,65 @@
+import pytest
+
+import leaderboard
+from aggregate import ALL, DAY
+from ingest import Packet
+from samples import info, random_packets
+
+
+@pytest.mark.parametrize('metric', leaderboard.METRICS)
+@pytest.mark.parametrize('training_type', [ALL, 'Running'])
+def test_matches_full_sort(metric, training_type):
+    packets = random_packets(2000, seed=1, codes=('RUN', 'WLK'),
+                             athletes=50)
+    board = leaderboard.Leaderboard(k=10, period='all')
+    assert board.update_many(packets) == len(packets)
+    results = []
+    for message in map(info, packets):
+        if training_type in (ALL, message.training_type):
+            results.append(getattr(message, metric))
+    expected = sorted(results, reverse=True)[:10]
+    assert [row.value for row in board.top(metric, training_type)] == (
+        expected), 'Таблица должна совпадать с полной сортировкой'
+
+
+def test_ties_share_rank_and_keep_order():
+    board = leaderboard.Leaderboard(k=3, period='all')
+    for athlete in ('ann', 'bob', 'eve', 'max'):
+        board.update_packet(Packet('RUN', [15000, 1, 75], athlete, 0))
+    rows = board.top('calories', 'Running')
+    assert [(row.rank, row.athlete) for row in rows] == [
+        (1, 'ann'), (1, 'bob'), (1, 'eve')], (
+        'Равные результаты делят место, раньше пришедший выше')
+
+
+def test_ranks_after_tie():
+    top = leaderboard.TopK(5)
+    for value, athlete in ((3, 'a'), (5, 'b'), (5, 'c'), (1, 'd')):
+        top.push(value, athlete, 0, None)
+    assert [(row.rank, row.value) for row in top.rows()] == [
+        (1, 5), (1, 5), (3, 3), (4, 1)]
+    assert len(top.rows(limit=2)) == 2
+
+
+def test_period_rollover():
+    board = leaderboard.Leaderboard(k=5, period='day', keep=2)
+    board.update_packet(Packet('RUN', [15000, 1, 75], 'ann', 0))
+    board.update_packet(Packet('RUN', [9000, 1, 75], 'bob', DAY))
+    assert [row.athlete for row in board.top('distance')] == ['bob']
+    assert [row.athlete for row in board.top('distance', at=0)] == ['ann']
+    board.update_packet(Packet('RUN', [1000, 1, 75], 'eve', 2 * DAY))
+    assert board.top('distance', at=0) == [], (
+        'Старый период должен удаляться при смене периода')
+    board.update_packet(Packet('RUN', [20000, 1, 75], 'max', 10))
+    assert sorted(board.boards) == [1, 2], (
+        'Результаты удалённых периодов не учитываются')
+    board.update_packet(Packet('RUN', [20000, 1, 75], 'max', DAY + 10))
+    assert [row.athlete for row in board.top('distance', at=DAY)] == [
+        'max', 'bob']
+
+
+def test_unknown_metric_and_period():
+    with pytest.raises(ValueError):
+        leaderboard.Leaderboard(period='decade')
+    with pytest.raises(ValueError):
+        leaderboard.Leaderboard().top('weight')
@@ -0,0 +1,62 @@
+import pytest
+
+import ingest
+import parallel
+from samples import csv_line, random_packets
+
+
+@pytest.fixture(scope='module')
+def packet_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('parallel') / 'packets.csv'
+    path.write_text(''.join(csv_line(packet) + '\n'
+                            for packet in random_packets(2000, seed=7)))
+    return str(path)
+
+
+def serial(path):
+    with open(path) as lines:
+        return list(ingest.iter_info(ingest.iter_packets(lines)))
+
+
+@pytest.mark.parametrize('shard_bytes', [1, 100, 4096, 10 ** 9])
+def test_byte_shards_cover_file(packet_file, shard_bytes):
+    shards = parallel.byte_shards(packet_file, shard_bytes)
+    lines = []
+    for shard in shards:
+        lines.extend(parallel.read_shard(packet_file, shard))
+    with open(packet_file) as stream:
+        assert lines == list(stream)
+
+
+def test_shards_split_lines_like_serial(tmp_path):
+    path = tmp_path / 'packets.jsonl'
+    path.write_text(
+        '{"type": "RUN", "data": [15000, 1, 75], "athlete": "a\u2028b"}\n'
+        '{"type": "WLK", "data": [9000, 1, 75, 180], "athlete": "c\x85d"}\n',
+        encoding='utf-8')
+    result = parallel.process_file(str(path), 'jsonl', workers=2,
+                                   shard_bytes=16)
+    with open(path, encoding='utf-8') as lines:
+        assert list(result) == list(ingest.iter_info(
+            ingest.iter_packets(lines, 'jsonl'))), (
+            'Шарды разбиты на строки иначе, чем при чтении файла')
+
+
+def test_process_file_ordered(packet_file):
+    result = list(parallel.process_file(packet_file, workers=3,
+                                        shard_bytes=2048))
+    assert result == serial(packet_file)
+
+
+def test_process_file_unordered(packet_file):
+    result = parallel.process_file(packet_file, workers=3,
+                                   shard_bytes=2048, ordered=False)
+    assert sorted(map(repr, result)) == sorted(map(repr,
+                                                   serial(packet_file)))
+
+
+def test_process_packets(packet_file):
+    with open(packet_file) as lines:
+        result = list(parallel.process_packets(ingest.iter_packets(lines),
+                                               workers=2, chunk_size=64))
+    assert result == serial(packet_file)
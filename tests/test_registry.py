@@ -0,0 +1,144 @@
+import pytest
+
+import batch
+import compact
+import homework
+import registry
+
+
+@pytest.fixture
+def cycling():
+    training_class = registry.define_workout(
+        'CYC', 'Cycling', homework.Training,
+        fields=('action', 'duration', 'weight', 'wheel'),
+        coefficients={'COEFF_CALORIE_1': 7.2, 'COEFF_CALORIE_2': 0.5},
+        distance='action * wheel / M_IN_KM',
+        calories=('(COEFF_CALORIE_1 + speed * COEFF_CALORIE_2)'
+                  ' * weight * duration'),
+    )
+    yield training_class
+    registry.unregister_workout('CYC')
+
+
+def test_registered_types():
+    assert list(registry.WORKOUT_TYPES) == ['SWM', 'RUN', 'WLK']
+    assert registry.WORKOUT_TYPES['RUN'].training_class is homework.Running
+
+
+def test_read_package_unknown_type():
+    with pytest.raises(ValueError, match='используйте: SWM, RUN, WLK'):
+        homework.read_package('BOX', [1, 1, 1])
+
+
+def test_define_workout(cycling):
+    training = homework.read_package('CYC', [3000, 0.5, 70, 2.1])
+    assert isinstance(training, homework.Training)
+    assert training.get_distance() == 3000 * 2.1 / 1000
+    info = training.show_training_info()
+    assert info.training_type == 'Cycling'
+    assert info.calories == (7.2 + info.speed * 0.5) * 70 * 0.5
+
+
+def test_defined_workout_batch_matches_scalar(cycling):
+    rows = [[3000, 0.5, 70, 2.1], [1234, 1.5, 81, 2.07]]
+    result = batch.compute_batch(
+        ['CYC', 'CYC'],
+        action=[r[0] for r in rows],
+        duration=[r[1] for r in rows],
+        weight=[r[2] for r in rows],
+        wheel=[r[3] for r in rows],
+    )
+    for i, data in enumerate(rows):
+        info = cycling(*data).show_training_info()
+        assert (result.distance[i], result.speed[i],
+                result.calories[i]) == (info.distance, info.speed,
+                                        info.calories)
+
+
+def test_defined_workout_compact_paths(cycling):
+    data = [3000, 0.5, 70, 2.1]
+    expected = cycling(*data).show_training_info()
+    slotted = compact.read_package_slotted('CYC', data)
+    assert slotted.show_training_info() == expected
+    assert compact.TrainingBatch('CYC', [data]).show_training_info() == [
+        expected
+    ]
+
+
+def test_coefficients_read_at_call_time(monkeypatch):
+    monkeypatch.setattr(homework.Running, 'COEFF_CALORIE_1', 19)
+    result = batch.compute_batch(['RUN'], [15000], [1], [75])
+    expected = homework.Running(15000, 1, 75).get_spent_calories()
+    assert result.calories[0] == expected
+
+
+@pytest.mark.parametrize('formula', [
+    'weight * UNKNOWN',
+    'calories * 2',
+    '__import__("os").getpid()',
+])
+def test_invalid_formula(formula):
+    with pytest.raises(ValueError):
+        registry.register_workout('BAD', homework.Running,
+                                  ('action', 'duration', 'weight'),
+                                  calories=formula)
+    assert 'BAD' not in registry.WORKOUT_TYPES
+
+
+def test_duplicate_code():
+    with pytest.raises(ValueError):
+        registry.register_workout('RUN', homework.Running,
+                                  ('action', 'duration', 'weight'),
+                                  calories='weight')
+
+
+@pytest.mark.parametrize('code, data', [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+])
+def test_builtin_formulas_match_methods(code, data):
+    workout = registry.get_workout(code)
+    training = homework.read_package(code, data)
+    for metric, expression in workout.formulas.items():
+        method = registry.compile_method(metric, expression, workout.fields)
+        assert method(training) == getattr(
+            training, registry.METHODS[metric])(), (
+            f'Формула {metric} для {code} расходится с методом класса')
+
+
+@pytest.fixture
+def diving():
+    training_class = registry.define_workout(
+        'DIV', 'Diving', homework.Swimming,
+        fields=('action', 'duration', 'weight', 'length_pool',
+                'count_pool', 'depth'),
+        coefficients={'COEFF_DEPTH': 0.1},
+        calories='speed * weight * (1 + depth * COEFF_DEPTH)',
+    )
+    yield training_class
+    registry.unregister_workout('DIV')
+
+
+def test_define_workout_from_registered_base(diving):
+    data = [720, 1, 80, 25, 40, 5]
+    training = homework.read_package('DIV', data)
+    assert training.depth == 5
+    assert training.length_pool == 25
+    assert registry.get_workout('DIV').formulas['speed'] == (
+        registry.get_workout('SWM').formulas['speed'])
+    info = training.show_training_info()
+    assert info.speed == homework.Swimming(*data[:5]).get_mean_speed()
+    result = batch.compute_batch(
+        ['DIV'], **{name: [value] for name, value in zip(
+            registry.get_workout('DIV').fields, data)})
+    assert (result.distance[0], result.speed[0], result.calories[0]) == (
+        info.distance, info.speed, info.calories), (
+        'Пакетный и скалярный расчёт расходятся')
+
+
+def test_define_workout_missing_base_fields():
+    with pytest.raises(ValueError, match='length_pool'):
+        registry.define_workout('DIV', 'Diving', homework.Swimming,
+                                calories='weight')
+    assert 'DIV' not in registry.WORKOUT_TYPES
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+
+import pytest
+
+import homework
+import report
+from samples import PACKAGES, info
+
+
+@pytest.fixture
+def messages():
+    return [info(package) for package in PACKAGES]
+
+
+def test_text_matches_get_message(messages):
+    expected = ''.join(m.get_message() + '\n' for m in messages)
+    assert report.render_text(messages) == expected
+
+
+def test_csv_full_precision(messages):
+    stream = io.StringIO()
+    assert report.write_report(messages, stream, 'csv') == len(messages)
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert [row['training_type'] for row in rows] == [
+        m.training_type for m in messages
+    ]
+    assert [float(row['calories']) for row in rows] == [
+        m.calories for m in messages
+    ]
+
+
+def test_jsonl_full_precision(messages):
+    stream = io.StringIO()
+    report.write_report(messages, stream, 'jsonl')
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == [
+        {'training_type': m.training_type, 'duration': m.duration,
+         'distance': m.distance, 'speed': m.speed, 'calories': m.calories}
+        for m in messages
+    ]
+
+
+def test_csv_quotes_training_type():
+    message = homework.InfoMessage('Bike, "road"', 1, 2.5, 2.5, 100.0)
+    rows = list(csv.reader(io.StringIO(report.render_csv([message]))))
+    assert rows == [['Bike, "road"', '1', '2.5', '2.5', '100.0']]
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf')])
+def test_jsonl_rejects_non_finite(value):
+    message = homework.InfoMessage('Running', 1, value, 2.5, 100.0)
+    with pytest.raises(ValueError):
+        report.render_jsonl([message])
+
+
+def test_sink_flushes_in_batches(messages):
+    class CountingStream(io.StringIO):
+        writes = 0
+
+        def write(self, text):
+            self.writes += 1
+            return super().write(text)
+
+    stream = CountingStream()
+    with report.BufferedSink(stream, 'text', flush_every=2) as sink:
+        for message in messages * 2:
+            sink.write(message)
+        assert stream.writes == 3
+    assert stream.writes == 3
+    assert sink.count == 6
+    assert len(stream.getvalue().splitlines()) == 6
+
+
+def test_percent_template_escapes_percent():
+    template, names = report.percent_template(
+        '{training_type}: 100% {speed:.1f}')
+    assert names == ('training_type', 'speed')
+    assert template % ('Running', 2.25) == 'Running: 100% 2.2'
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        report.BufferedSink(io.StringIO(), 'xml')
@@ -0,0 +1,78 @@
+import pytest
+
+import homework
+import sensors
+from ingest import Packet
+
+PROFILES = {
+    'ann': sensors.Profile('RUN', 75),
+    'bob': sensors.Profile('WLK', 80, height=180),
+    'eve': sensors.Profile('SWM', 60, length_pool=25),
+}
+
+
+def session(athlete, start, seconds, steps=2, lap_every=0):
+    return [sensors.Sample(athlete, start + i, steps,
+                           int(bool(lap_every) and (i + 1) % lap_every == 0))
+            for i in range(seconds)]
+
+
+@pytest.mark.parametrize('athlete, lap_every, expected', [
+    ('ann', 0, [7200, 1.0, 75]),
+    ('bob', 0, [7200, 1.0, 80, 180]),
+    ('eve', 90, [7200, 1.0, 60, 25, 40]),
+])
+def test_session_packet(athlete, lap_every, expected):
+    reducer = sensors.SessionReducer(PROFILES)
+    packets = list(reducer.reduce(session(athlete, 1000, 3600,
+                                          lap_every=lap_every)))
+    assert packets == [Packet(PROFILES[athlete].workout_type, expected,
+                              athlete, 1000)]
+    info = homework.read_package(packets[0].workout_type,
+                                 packets[0].data).show_training_info()
+    assert info.duration == 1.0
+
+
+def test_gap_splits_sessions():
+    samples = session('ann', 0, 60) + session('ann', 60 + 600, 30)
+    packets = list(sensors.SessionReducer(PROFILES, gap=300).reduce(samples))
+    assert [(p.timestamp, p.data[0]) for p in packets] == [(0, 120),
+                                                           (660, 60)]
+
+
+def test_interleaved_athletes_bounded_state():
+    reducer = sensors.SessionReducer(PROFILES, gap=10)
+    samples = []
+    for second in range(100):
+        samples.extend(sensors.Sample(name, second, 1) for name in
+                       ('ann', 'bob') if second < 50 or name == 'bob')
+    packets = []
+    for sample in samples:
+        packet = reducer.add(sample)
+        assert packet is None
+        packets.extend(reducer.expire(reducer.clock))
+        assert len(reducer.sessions) <= 2
+    assert [(p.athlete, p.data[0]) for p in packets] == [('ann', 50)]
+    assert [(p.athlete, p.data[0]) for p in reducer.expire()] == [
+        ('bob', 100)]
+    assert reducer.sessions == {}
+
+
+def test_late_sample_extends_session():
+    reducer = sensors.SessionReducer(PROFILES)
+    for timestamp in (10, 20, 5):
+        reducer.add(sensors.Sample('ann', timestamp, 1))
+    packet, = reducer.expire()
+    assert packet.timestamp == 5
+    assert packet.data[:2] == [3, 16 / sensors.SEC_IN_HOUR]
+
+
+def test_iter_samples():
+    lines = ['# athlete,timestamp,steps,laps', 'eve,1.5,3,1', '']
+    assert list(sensors.iter_samples(lines)) == [
+        sensors.Sample('eve', 1.5, 3, 1)]
+
+
+def test_unknown_athlete():
+    with pytest.raises(ValueError):
+        sensors.SessionReducer(PROFILES).add(sensors.Sample('max', 0, 1))
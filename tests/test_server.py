@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import server
+from samples import PACKAGES, info
+
+
+async def exchange(lines, **options):
+    packet_server = server.PacketServer(**options)
+    host, port = await packet_server.start()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(''.join(lines).encode('utf-8'))
+    await writer.drain()
+    writer.write_eof()
+    replies = [json.loads(line) async for line in reader]
+    writer.close()
+    await packet_server.close()
+    return replies, packet_server.stats.snapshot()
+
+
+def expected_reply(package):
+    message = info(package)
+    return {'training_type': message.training_type,
+            'duration': message.duration,
+            'distance': message.distance, 'speed': message.speed,
+            'calories': message.calories}
+
+
+def test_replies_in_order():
+    lines = [','.join(map(str, [code, *data])) + '\n'
+             for code, data in PACKAGES * 20]
+    replies, stats = asyncio.run(exchange(lines, max_batch=8))
+    assert replies == [expected_reply(p) for p in PACKAGES * 20]
+    assert stats['processed'] == 60
+    assert stats['batches'] >= 60 // 8
+    assert 0 <= stats['p50'] <= stats['p99']
+
+
+def test_deadline_flushes_partial_batch():
+    replies, stats = asyncio.run(exchange(
+        ['RUN,15000,1,75\n'], max_batch=1000, max_delay=0.01))
+    assert replies == [expected_reply(PACKAGES[1])]
+    assert stats['batches'] == 1
+
+
+def test_invalid_packets_get_errors():
+    lines = ['BOX,1,1,1\n', 'RUN,1,2\n', 'RUN,abc,1,1\n', 'RUN,1,0,75\n',
+             'RUN,15000,1,75\n']
+    replies, stats = asyncio.run(exchange(lines))
+    assert all('error' in reply for reply in replies[:4])
+    assert replies[4] == expected_reply(PACKAGES[1])
+    assert stats['errors'] == 4
+
+
+def test_overflowing_packet_gets_error():
+    lines = ['WLK,1e200,1,75,180\n', 'RUN,1e308,1e-300,75\n',
+             'RUN,15000,1,75\n']
+    replies, _ = asyncio.run(asyncio.wait_for(exchange(lines), 5))
+    assert 'error' in replies[0]
+    assert 'error' in replies[1]
+    assert replies[2] == expected_reply(PACKAGES[1])
+
+
+def test_jsonl_format():
+    lines = [json.dumps({'type': code, 'data': data}) + '\n'
+             for code, data in PACKAGES]
+    replies, _ = asyncio.run(exchange(lines, fmt='jsonl'))
+    assert replies == [expected_reply(p) for p in PACKAGES]
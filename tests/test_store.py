@@ -0,0 +1,74 @@
+import pytest
+
+import aggregate
+import store
+from ingest import Packet
+from samples import info
+
+DAY = aggregate.DAY
+PACKETS = [
+    Packet('RUN', [15000, 1, 75], 'ann', 0),
+    Packet('RUN', [9000, 1, 75], 'ann', 3 * DAY),
+    Packet('SWM', [720, 1, 80, 25, 40], 'ann', 40 * DAY),
+    Packet('WLK', [9000, 1, 75, 180], 'bob', 40 * DAY),
+]
+
+
+@pytest.fixture
+def workouts(tmp_path):
+    with store.WorkoutStore(str(tmp_path / 'workouts.db')) as result:
+        assert result.add_packets(PACKETS, batch_size=3) == len(PACKETS)
+        yield result
+
+
+def test_messages_roundtrip(workouts):
+    assert list(workouts.messages()) == [info(p) for p in PACKETS]
+    assert len(workouts) == len(PACKETS)
+
+
+@pytest.mark.parametrize('athlete, training_type', [
+    (None, None),
+    ('ann', None),
+    (None, 'Running'),
+    ('ann', 'Running'),
+    (None, 'SportsWalking'),
+    ('nobody', None),
+])
+def test_totals_match_aggregator(workouts, athlete, training_type):
+    aggregator = aggregate.Aggregator()
+    aggregator.update_many(PACKETS)
+    expected = aggregator.stats(athlete or aggregate.ALL,
+                                training_type or aggregate.ALL)
+    totals = workouts.totals(athlete, training_type)
+    for name, value in totals.items():
+        assert value == pytest.approx(expected[name]), (
+            f'Итог {name} должен совпадать с агрегатором')
+
+
+def test_totals_by_period(workouts):
+    rows = workouts.totals_by_period('month', athlete='ann')
+    assert [(row['key'], row['count']) for row in rows] == [
+        ('1970-01', 2), ('1970-02', 1)]
+    days = workouts.totals_by_period('day', start=DAY, end=41 * DAY)
+    assert [(row['key'], row['count']) for row in days] == [
+        ('1970-01-04', 1), ('1970-02-10', 2)]
+
+
+def test_totals_by_type(workouts):
+    rows = workouts.totals_by_type()
+    assert {row['key']: row['count'] for row in rows} == {
+        'Running': 2, 'Swimming': 1, 'SportsWalking': 1}
+
+
+def test_queries_use_indexes(workouts):
+    for where in ('athlete = ?', 'training_type = ?', 'timestamp >= ?'):
+        plan = workouts.connection.execute(
+            f'EXPLAIN QUERY PLAN SELECT {store.TOTALS} FROM workouts '
+            f'WHERE {where}', ['x']).fetchall()
+        assert 'USING' in ' '.join(row[-1] for row in plan), (
+            f'Запрос по условию {where} должен использовать индекс')
+
+
+def test_unknown_period(workouts):
+    with pytest.raises(ValueError):
+        workouts.totals_by_period('decade')
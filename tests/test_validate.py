@@ -0,0 +1,95 @@
+import io
+import itertools
+import json
+import math
+
+import pytest
+
+import ingest
+import validate
+from samples import LINES, info
+
+
+@pytest.mark.parametrize('line, reason, detail', [
+    ('BOX,1,1,1', 'unknown_type', 'BOX'),
+    ('RUN,15000,1', 'arity', 'ожидается 3, получено 2'),
+    ('SWM,720,1,80,25', 'arity', 'ожидается 5, получено 4'),
+    ('RUN,15000,0,75', 'not_positive', 'duration'),
+    ('WLK,9000,1,75,-180', 'not_positive', 'height'),
+    ('SWM,720,1,80,0,40', 'not_positive', 'length_pool'),
+    ('RUN,15000,nan,75', 'not_number', 'duration'),
+    ('RUN,15000,inf,75', 'not_number', 'duration'),
+    ('WLK,1e200,1,75,180', 'out_of_range', 'action'),
+    ('RUN,1e308,1e-300,75', 'out_of_range', 'action'),
+    ('RUN,15000,1e-300,75', 'out_of_range', 'duration'),
+    ('RUN,' + '9' * 400 + ',1,75', 'out_of_range', 'action'),
+    ('RUN,15000,x,75', 'parse', None),
+])
+def test_reject_reasons(line, reason, detail):
+    (valid, rejects), = validate.validate_lines([line])
+    assert valid == []
+    assert len(rejects) == 1
+    assert rejects[0].reason == reason, (
+        f'Строка {line} должна быть отбракована с причиной {reason}')
+    assert reason in validate.REASONS
+    if detail is not None:
+        assert rejects[0].detail == detail
+    assert (rejects[0].record, rejects[0].line) == (line, 1)
+
+
+def test_valid_rows_pass_through():
+    lines = LINES + ['RUN,15000,0,75', '# comment', ''] + LINES
+    sink = validate.RejectSink(io.StringIO())
+    packets = list(validate.iter_valid(lines, rejects=sink, chunk_size=2))
+    assert packets == list(ingest.iter_packets(LINES * 2))
+    assert sink.counts == {'not_positive': 1}
+    assert sink.total == 1
+    record = json.loads(sink.stream.getvalue())
+    assert record == {'reason': 'not_positive', 'detail': 'duration',
+                      'record': 'RUN,15000,0,75', 'line': 4}
+
+
+def test_valid_packets_never_raise():
+    lines = LINES + ['RUN,1,0,1', 'WLK,1,1,1,0', 'SWM,1,1,1,-1,1', 'SWM,1']
+    for packet in validate.iter_valid(lines):
+        info(packet)
+
+
+def test_limits_never_overflow():
+    extremes = [-validate.MAX_VALUE, validate.MAX_VALUE]
+    positive = [validate.MIN_POSITIVE, validate.MAX_VALUE]
+    for code, (fields, indexes) in validate.build_rules().items():
+        choices = [positive if index in indexes else extremes
+                   for index in range(len(fields))]
+        for data in itertools.product(*choices):
+            message = info((code, list(data)))
+            assert all(map(math.isfinite, (message.distance, message.speed,
+                                           message.calories))), (
+                f'Пакет {code} {data} в пределах проверки переполняется')
+
+
+def test_jsonl_unhashable_type():
+    lines = [json.dumps({'type': ['RUN'], 'data': [15000, 1, 75]}),
+             json.dumps({'type': {'RUN': 1}, 'data': [15000, 1, 75]})]
+    (valid, rejects), = validate.validate_lines(lines, 'jsonl')
+    assert valid == []
+    assert [r.reason for r in rejects] == ['unknown_type', 'unknown_type']
+
+
+def test_validate_chunk_packets():
+    packets = [ingest.Packet('RUN', [15000, 1, 75]),
+               ingest.Packet('RUN', ['15000', 1, 75]),
+               ingest.Packet('RUN', [True, 1, 75])]
+    valid, rejects = validate.validate_chunk(packets)
+    assert valid == packets[:1]
+    assert [r.reason for r in rejects] == ['not_number', 'not_number']
+    assert rejects[0].record == 'RUN,15000,1,75'
+
+
+def test_jsonl_parse_errors():
+    lines = ['{"type": "RUN"}', 'not json',
+             json.dumps({'type': 'RUN', 'data': [15000, 1, 75]})]
+    (valid, rejects), = validate.validate_lines(lines, 'jsonl')
+    assert len(valid) == 1
+    assert [(r.reason, r.line) for r in rejects] == [('parse', 1),
+                                                     ('parse', 2)]
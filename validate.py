@@ -0,0 +1,174 @@
+"""Пакетная проверка пакетов с отбраковкой в отдельный файл.
+
+Пакеты проверяются порциями без исключений на каждую плохую запись:
+тип тренировки, количество полей по реестру и области значений.
+Плохие записи получают код причины и уходят в файл отказов, а
+корректные пакеты передаются дальше и считаются без ошибок.
+
+Поля ограничены по модулю `MAX_VALUE`, положительные поля - снизу
+`MIN_POSITIVE`; в этих пределах формулы встроенных типов тренировок
+не переполняются.
+"""
+import json
+from collections import Counter
+from math import isfinite
+from typing import (Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Sequence, TextIO, Tuple)
+
+from ingest import DEFAULT_CHUNK_SIZE, Packet, chunked, get_parser
+from registry import WORKOUT_TYPES
+
+POSITIVE_FIELDS: Tuple[str, ...] = ('duration', 'height', 'length_pool')
+NUMBER_TYPES = frozenset((int, float))
+MAX_VALUE: float = 1e9
+MIN_POSITIVE: float = 1e-6
+REASONS: Dict[str, str] = {
+    'parse': 'строка не разбирается',
+    'unknown_type': 'неизвестный тип тренировки',
+    'arity': 'неверное количество полей',
+    'not_number': 'поле не является конечным числом',
+    'not_positive': 'поле должно быть положительным',
+    'out_of_range': 'поле вне допустимого диапазона',
+}
+
+Rules = Dict[str, Tuple[Tuple[str, ...], Tuple[int, ...]]]
+
+
+class Reject(NamedTuple):
+    """Отбракованная запись с кодом причины из `REASONS`."""
+
+    reason: str
+    detail: str
+    record: str
+    line: int = 0
+
+
+def build_rules() -> Rules:
+    """Поля и индексы положительных полей каждого типа из реестра."""
+    return {
+        code: (workout.fields,
+               tuple(index for index, name in enumerate(workout.fields)
+                     if name in POSITIVE_FIELDS))
+        for code, workout in WORKOUT_TYPES.items()
+    }
+
+
+def _check_value(value: object) -> Optional[str]:
+    """Код причины для плохого значения поля, иначе None."""
+    if type(value) not in NUMBER_TYPES or (
+            type(value) is float and not isfinite(value)):
+        return 'not_number'
+    if not -MAX_VALUE <= value <= MAX_VALUE:
+        return 'out_of_range'
+    return None
+
+
+def check_packet(packet: Packet,
+                 rules: Rules) -> Optional[Tuple[str, str]]:
+    """Код причины и описание для плохого пакета, иначе None."""
+    workout_type = packet.workout_type
+    rule = rules.get(workout_type) if isinstance(workout_type, str) else None
+    if rule is None:
+        return 'unknown_type', str(workout_type)
+    fields, positive = rule
+    data = packet.data
+    if len(data) != len(fields):
+        return 'arity', f'ожидается {len(fields)}, получено {len(data)}'
+    for name, value in zip(fields, data):
+        reason = _check_value(value)
+        if reason is not None:
+            return reason, name
+    for index in positive:
+        if data[index] <= 0:
+            return 'not_positive', fields[index]
+        if data[index] < MIN_POSITIVE:
+            return 'out_of_range', fields[index]
+    return None
+
+
+def packet_text(packet: Packet) -> str:
+    """Пакет в виде строки CSV для файла отказов."""
+    return ','.join(map(str, [packet.workout_type, *packet.data]))
+
+
+def validate_chunk(packets: Sequence[Packet],
+                   rules: Optional[Rules] = None,
+                   ) -> Tuple[List[Packet], List[Reject]]:
+    """Разделить порцию пакетов на корректные и отбракованные."""
+    if rules is None:
+        rules = build_rules()
+    valid: List[Packet] = []
+    rejects: List[Reject] = []
+    for packet in packets:
+        problem = check_packet(packet, rules)
+        if problem is None:
+            valid.append(packet)
+        else:
+            rejects.append(Reject(*problem, packet_text(packet)))
+    return valid, rejects
+
+
+def validate_lines(lines: Iterable[str],
+                   fmt: str = 'csv',
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   ) -> Iterator[Tuple[List[Packet], List[Reject]]]:
+    """Разобрать и проверить строки порциями по `chunk_size`.
+
+    Для каждой порции отдаются корректные пакеты и отказы с номерами
+    строк. Правила берутся из реестра один раз на порцию.
+    """
+    parse = get_parser(fmt)
+    for chunk in chunked(enumerate(lines, 1), chunk_size):
+        rules = build_rules()
+        valid: List[Packet] = []
+        rejects: List[Reject] = []
+        for number, line in chunk:
+            try:
+                packet = parse(line)
+            except (KeyError, OverflowError, TypeError,
+                    ValueError) as error:
+                rejects.append(Reject('parse', str(error),
+                                      line.rstrip('\n'), number))
+                continue
+            if packet is None:
+                continue
+            problem = check_packet(packet, rules)
+            if problem is None:
+                valid.append(packet)
+            else:
+                rejects.append(Reject(*problem, line.rstrip('\n'), number))
+        yield valid, rejects
+
+
+class RejectSink:
+    """Файл отказов в формате JSON-lines со счётчиками по причинам."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.counts: Counter = Counter()
+
+    def write(self, rejects: Iterable[Reject]) -> None:
+        """Записать отказы одной операцией."""
+        lines = []
+        for reject in rejects:
+            self.counts[reject.reason] += 1
+            lines.append(json.dumps(reject._asdict(), ensure_ascii=False))
+        if lines:
+            self.stream.write('\n'.join(lines) + '\n')
+
+    @property
+    def total(self) -> int:
+        """Количество записанных отказов."""
+        return sum(self.counts.values())
+
+
+def iter_valid(lines: Iterable[str],
+               fmt: str = 'csv',
+               rejects: Optional[RejectSink] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               ) -> Iterator[Packet]:
+    """Корректные пакеты из строк; отказы уходят в `rejects`."""
+    for valid, rejected in validate_lines(lines, fmt, chunk_size):
+        if rejects is not None:
+            rejects.write(rejected)
+        yield from valid